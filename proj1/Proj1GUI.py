@@ -53,6 +53,8 @@ class Proj1GUI( QWidget ):
 		self.outputF.setMinimumSize(500,0)
 		self.outputMR = QLabel('')
 		self.outputMR.setMinimumSize(500,0)
+		self.outputBPSW = QLabel('')
+		self.outputBPSW.setMinimumSize(500,0)
 
 		# N
 		h = QHBoxLayout()
@@ -79,6 +81,9 @@ class Proj1GUI( QWidget ):
 		h = QHBoxLayout()
 		h.addWidget( self.outputMR )
 		vbox.addLayout(h)
+		h = QHBoxLayout()
+		h.addWidget( self.outputBPSW )
+		vbox.addLayout(h)
 
         # When the Test button is clicked, call testClicked()
 		self.test.clicked.connect(self.testClicked)
@@ -110,12 +115,21 @@ class Proj1GUI( QWidget ):
 				self.outputF.setText('<i>Fermat Result:</i> {:d} is <b>not prime</b>'.format(n))
 
 			# Output results from Miller-Rabin and compute the appropriate error bound, if necessary
-			if mr == 'prime':
-				prob = mprobability(k)
+			if mr == 'prime' and n < DETERMINISTIC_LIMIT:
+				# Below 2^64 Miller-Rabin uses fixed witnesses, so its answer is exact rather than probable
+				self.outputMR.setText( '<i>MR Result:</i> {:d} <b>is prime</b> (deterministic, N &lt; 2^64)'.format(n) )
+			elif mr == 'prime':
+				prob = mr_confidence(n,k)
 				self.outputMR.setText( '<i>MR Result:</i> {:d} <b>is prime</b> with probability {:5.15f}'.format(n,prob) )
 			else: # Should be 'composite'
 				self.outputMR.setText('<i>MR Result:</i> {:d} is <b>not prime</b>'.format(n))
 
+			# Baillie-PSW is a single fixed-cost test, so it ignores K and has no error bound to report
+			if baillie_psw(n) == 'prime':
+				self.outputBPSW.setText( '<i>BPSW Result:</i> {:d} <b>is prime</b> (no known counterexample)'.format(n) )
+			else: # Should be 'composite'
+				self.outputBPSW.setText('<i>BPSW Result:</i> {:d} is <b>not prime</b>'.format(n))
+
         # If inputs not valid, display an error
 		except Exception as e:
 			self.outputF.setText('<i>ERROR:</i> inputs must be integers!')
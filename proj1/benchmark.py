@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+
+# Headless timing harness for the primality code in fermat.py. It does not import PyQt, so it can be run
+# straight from a terminal or a CI job:
+#
+#   python3 benchmark.py                                   compare mod_exp against the recursive version and pow
+#   python3 benchmark.py --suite -o new.json               time mod_exp, fermat and miller_rabin, fit growth rates
+#   python3 benchmark.py --suite -o new.json -b old.json   ...and exit with status 1 if anything got slower
+#   python3 benchmark.py --multiply                        compare the multiplication.py variants at 10k-1M bits,
+#                                                          and sweep the recursion cutoffs of karatsuba and toom3
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+
+from fermat import ModContext, fermat, miller_rabin, mod_exp, mod_exp_recursive
+from multiplication import MULTIPLIERS, karatsuba, toom3
+
+
+BIT_LENGTHS = [256, 512, 1024, 2048, 4096, 8192]
+
+# Exponents p of Mersenne primes 2^p - 1. They give fixed, reproducible prime inputs for the primality tests, which
+# have to run all k rounds on a prime; a composite usually exits after the first round.
+MERSENNE_EXPONENTS = [89, 127, 521, 607, 1279, 2203, 2281]
+
+# Operand sizes for the multiplication benchmark.
+MULTIPLY_BIT_LENGTHS = [10000, 20000, 50000, 100000, 200000, 500000, 1000000]
+
+# multiply_iterative is O(n^2) Python-level additions, so it is only timed up to this size.
+ITERATIVE_MAX_BITS = 100000
+
+# Recursion cutoffs swept for karatsuba and toom3, from deep Python recursion down to a single split.
+MULTIPLY_CUTOFFS = [1 << 10, 1 << 12, 1 << 14, 1 << 15, 1 << 16, 1 << 17]
+
+# A benchmark counts as regressed when it is this much slower (as a fraction) than the baseline run.
+REGRESSION_TOLERANCE = 0.25
+
+
+def time_call(func, args, repeat=3):
+    # Returns the best wall-clock time out of `repeat` runs of func(*args), in seconds.
+    best = float('inf')
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def random_operands(bits, rng):
+    # An odd n-bit modulus with the top bit set, plus a base and an exponent of the same size.
+    N = rng.getrandbits(bits) | (1 << (bits - 1)) | 1
+    return rng.randrange(2, N - 1), N - 1, N
+
+
+def benchmark_mod_exp(bit_lengths=BIT_LENGTHS, repeat=3, seed=312):
+    # Times the sliding-window mod_exp against the old recursive version and the builtin three-argument pow.
+    # Returns a list of rows: (bits, sliding window seconds, recursive seconds, builtin pow seconds)
+    rng = random.Random(seed)
+    rows = []
+    oldLimit = sys.getrecursionlimit()
+    try:
+        for bits in bit_lengths:
+            x, y, N = random_operands(bits, rng)
+            assert mod_exp(x, y, N) == pow(x, y, N)
+            # The recursive version recurses once per exponent bit, so it needs room on the stack.
+            sys.setrecursionlimit(max(oldLimit, bits + 100))
+            rows.append((bits,
+                         time_call(mod_exp, (x, y, N), repeat),
+                         time_call(mod_exp_recursive, (x, y, N), repeat),
+                         time_call(pow, (x, y, N), repeat)))
+    finally:
+        sys.setrecursionlimit(oldLimit)
+    return rows
+
+
+def cross_check_mod_context(trials=200, seed=312):
+    # Cross-checks ModContext against the builtin three-argument pow, in both plain and Montgomery mode, on random
+    # moduli of many sizes plus the edge cases: N = 1, N = 2, even N, N = 2^k +- 1 and bases of 0, 1 and N-1.
+    # Raises AssertionError on the first mismatch and returns the number of comparisons made otherwise.
+    rng = random.Random(seed)
+    moduli = [1, 2, 3, 4, 5, 7, 8, 9, 15, 16, 17, 255, 256, 257, 65535, 65537, 2**61 - 1, 2**64, 2**64 + 1, 2**127 - 1]
+    for i in range(trials):
+        moduli.append(rng.getrandbits(rng.choice([8, 32, 64, 65, 127, 256, 521, 1024, 2048])) + 1)
+    checks = 0
+    for N in moduli:
+        bases = [0, 1, N - 1, N, N + 1, rng.randrange(N), rng.getrandbits(N.bit_length() + 16)]
+        exponents = [0, 1, 2, N - 1, N, rng.getrandbits(rng.choice([1, 7, 64, N.bit_length()]))]
+        for montgomery in (False, True):
+            context = ModContext(N, montgomery=montgomery)
+            for a in bases:
+                for e in exponents:
+                    assert context.pow(a, e) == pow(a, e, N), ('pow', N, a, e, montgomery)
+                b = rng.getrandbits(N.bit_length())
+                assert context.mul(a, b) == (a * b) % N, ('mul', N, a, b, montgomery)
+                checks += len(exponents) + 1
+    return checks
+
+
+def run_suite(repeat=3, k=10, seed=312):
+    # Times mod_exp on random operands at each of BIT_LENGTHS, and fermat and miller_rabin with k rounds on the
+    # Mersenne primes. Returns a JSON-ready dict with the timings and the fitted growth exponent of each function.
+    rng = random.Random(seed)
+    cases = {'mod_exp': [(bits, (mod_exp, random_operands(bits, rng))) for bits in BIT_LENGTHS]}
+    for name, test in (('fermat', fermat), ('miller_rabin', miller_rabin)):
+        cases[name] = [(p, (test, (2**p - 1, k))) for p in MERSENNE_EXPONENTS]
+
+    results = {}
+    for name, runs in cases.items():
+        random.seed(seed) # fermat and miller_rabin draw witnesses from the module-level generator.
+        bits = [b for b, run in runs]
+        seconds = [time_call(func, args, repeat) for b, (func, args) in runs]
+        results[name] = {'bits': bits, 'seconds': seconds, 'growth_exponent': fit_growth_exponent(bits, seconds)}
+    return {'python': platform.python_version(), 'machine': platform.machine(), 'timestamp': time.time(),
+            'repeat': repeat, 'k': k, 'seed': seed, 'results': results}
+
+
+def fit_growth_exponent(bits, seconds):
+    # Least-squares slope of log(seconds) against log(bits), i.e. the e in time ~ n^e. The fermat.py comments
+    # predict e = 3 for schoolbook multiplication; CPython's Karatsuba pushes large sizes a little below that.
+    xs = [math.log(b) for b in bits]
+    ys = [math.log(max(s, 1e-9)) for s in seconds]
+    xMean = sum(xs) / len(xs)
+    yMean = sum(ys) / len(ys)
+    return sum((x - xMean) * (y - yMean) for x, y in zip(xs, ys)) / sum((x - xMean) ** 2 for x in xs)
+
+
+def find_regressions(current, baseline, tolerance=REGRESSION_TOLERANCE):
+    # Compares two run_suite results and returns a list of (name, bits, baseline seconds, current seconds) for
+    # every timing that is more than `tolerance` slower than the baseline. Sizes only present in one run are ignored.
+    regressions = []
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        old = dict(zip(baseline['results'][name]['bits'], baseline['results'][name]['seconds']))
+        for bits, seconds in zip(result['bits'], result['seconds']):
+            if bits in old and seconds > old[bits] * (1 + tolerance):
+                regressions.append((name, bits, old[bits], seconds))
+    return regressions
+
+
+def benchmark_multiplication(bit_lengths=MULTIPLY_BIT_LENGTHS, repeat=3, seed=312):
+    # Times every variant in multiplication.MULTIPLIERS on random operands of each size, and checks each product
+    # against the builtin one. Returns a list of rows: (bits, {variant name: seconds}), with None for the sizes
+    # multiply_iterative skips.
+    rng = random.Random(seed)
+    rows = []
+    for bits in bit_lengths:
+        x, y = rng.getrandbits(bits) | (1 << (bits - 1)), rng.getrandbits(bits) | (1 << (bits - 1))
+        timings = {}
+        for name, multiply in MULTIPLIERS.items():
+            if name == 'iterative' and bits > ITERATIVE_MAX_BITS:
+                timings[name] = None
+                continue
+            assert multiply(x, y) == x * y, (name, bits)
+            timings[name] = time_call(multiply, (x, y), repeat)
+        rows.append((bits, timings))
+    return rows
+
+
+def benchmark_cutoffs(bit_lengths=MULTIPLY_BIT_LENGTHS, cutoffs=MULTIPLY_CUTOFFS, repeat=3, seed=312):
+    # Times karatsuba and toom3 at every recursion cutoff on random operands of each size. With their default
+    # cutoffs the smaller sizes never recurse at all, so this is what shows how the algorithms themselves compare
+    # with the builtin *, and where KARATSUBA_CUTOFF and TOOM3_CUTOFF come from. Returns a list of rows:
+    # (bits, builtin seconds, {(algorithm name, cutoff): seconds}).
+    rng = random.Random(seed)
+    rows = []
+    for bits in bit_lengths:
+        x, y = rng.getrandbits(bits) | (1 << (bits - 1)), rng.getrandbits(bits) | (1 << (bits - 1))
+        builtin = time_call(MULTIPLIERS['builtin'], (x, y), repeat)
+        timings = {}
+        for multiply in (karatsuba, toom3):
+            for cutoff in cutoffs:
+                assert multiply(x, y, cutoff) == x * y, (multiply.__name__, bits, cutoff)
+                timings[(multiply.__name__, cutoff)] = time_call(multiply, (x, y, cutoff), repeat)
+        rows.append((bits, builtin, timings))
+    return rows
+
+
+def print_multiplication_table(rows):
+    names = list(MULTIPLIERS)
+    print('{:>7} '.format('bits') + ' '.join('{:>12}'.format(name) for name in names))
+    for bits, timings in rows:
+        print('{:>7d} '.format(bits) + ' '.join('{:>12}'.format('-') if timings[name] is None else
+                                                '{:>12.6f}'.format(timings[name]) for name in names))
+
+
+def print_cutoff_table(rows, cutoffs=MULTIPLY_CUTOFFS):
+    # One block per algorithm, each time as a multiple of the builtin * on the same operands (below 1 is faster).
+    for name in ('karatsuba', 'toom3'):
+        print('{} time / builtin time, by cutoff (bits)'.format(name))
+        print('{:>7} '.format('bits') + ' '.join('{:>8d}'.format(cutoff) for cutoff in cutoffs))
+        for bits, builtin, timings in rows:
+            print('{:>7d} '.format(bits) + ' '.join('{:>8.2f}'.format(timings[(name, cutoff)] / builtin)
+                                                    for cutoff in cutoffs))
+
+
+def print_suite(suite):
+    for name, result in suite['results'].items():
+        print('{}: time ~ n^{:.2f}'.format(name, result['growth_exponent']))
+        for bits, seconds in zip(result['bits'], result['seconds']):
+            print('  {:>6d} bits {:>12.6f} s'.format(bits, seconds))
+
+
+def print_mod_exp_table(rows):
+    print('{:>6} {:>14} {:>14} {:>14} {:>10}'.format('bits', 'window (s)', 'recursive (s)', 'builtin (s)', 'speedup'))
+    for bits, window, recursive, builtin in rows:
+        print('{:>6d} {:>14.6f} {:>14.6f} {:>14.6f} {:>9.2f}x'.format(bits, window, recursive, builtin,
+                                                                     recursive / window))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks for the proj1 primality code.')
+    parser.add_argument('--suite', action='store_true', help='run the full suite instead of the mod_exp comparison')
+    parser.add_argument('--multiply', action='store_true', help='compare the big-integer multiplication variants')
+    parser.add_argument('-o', '--output', help='write the suite results to this JSON file')
+    parser.add_argument('-b', '--baseline', help='JSON file from an earlier --suite run to check for regressions')
+    parser.add_argument('-t', '--tolerance', type=float, default=REGRESSION_TOLERANCE,
+                        help='allowed slowdown against the baseline, as a fraction (default %(default)s)')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='runs per timing; the best one is kept')
+    args = parser.parse_args(argv)
+
+    if args.multiply:
+        print_multiplication_table(benchmark_multiplication(repeat=args.repeat))
+        print_cutoff_table(benchmark_cutoffs(repeat=args.repeat))
+        return 0
+    if not args.suite:
+        print('ModContext cross-check: {:d} comparisons passed'.format(cross_check_mod_context()))
+        print_mod_exp_table(benchmark_mod_exp(repeat=args.repeat))
+        return 0
+
+    suite = run_suite(repeat=args.repeat)
+    print_suite(suite)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(suite, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(suite, json.load(f), args.tolerance)
+        for name, bits, old, new in regressions:
+            print('REGRESSION: {} at {:d} bits took {:.6f} s, baseline {:.6f} s'.format(name, bits, new, old))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
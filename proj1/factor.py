@@ -0,0 +1,126 @@
+# Integer factorization built on fermat.py: trial division by the small-prime table, Pollard's p-1 with the
+# module's mod_exp, and Brent's variant of Pollard's rho. Every cofactor that comes out is checked with baillie_psw,
+# which is what ends the recursion.
+
+import functools
+import math
+import random
+
+from fermat import SMALL_PRIMES, _small_primes, baillie_psw, mod_exp
+
+
+# Smoothness bound for stage one of Pollard's p-1. It finds a prime p quickly whenever every prime power dividing
+# p - 1 is at most this bound.
+P_MINUS_1_BOUND = 20000
+
+# Brent's rho multiplies this many |x - y| values together before taking one gcd, so a gcd (O(n^2)) is paid once
+# per batch instead of once per step.
+RHO_BATCH = 128
+
+# Default limit on the rho steps spent on one cofactor, about 2-3 s of pure Python at 128 bits. That is enough to
+# find prime factors up to about 44 bits nearly every time (rho needs about sqrt(p) steps), but not the 60+ bit
+# factors of a balanced 128-bit semiprime, which would take minutes to hours.
+RHO_MAX_STEPS = 1 << 22
+
+
+class FactorizationError(ArithmeticError):
+    # Raised by factorize when a composite cofactor does not split within the rho step budget. factors holds the
+    # prime factors found so far and cofactor the composite part left, so factors times cofactor is the input.
+
+    def __init__(self, factors, cofactor):
+        super().__init__('no factor of the composite {} found within the rho step budget'.format(cofactor))
+        self.factors = factors
+        self.cofactor = cofactor
+
+
+def factorize(N, rng=random, maxSteps=RHO_MAX_STEPS):
+    # Returns the prime factors of N > 0 in increasing order, repeated by multiplicity, so their product is N.
+    # Small factors go by trial division and the rest by p-1 and then rho. Finding a factor p takes about sqrt(p)
+    # rho steps, so cofactors whose smallest prime is up to about 40 bits split in well under a second; a product
+    # of two 64-bit primes is out of reach for rho in pure Python. Each cofactor gets at most maxSteps rho steps
+    # (None for no limit), and FactorizationError is raised when one does not split within them.
+    if N < 1:
+        raise ValueError('factorize needs a positive integer')
+    factors = []
+    for p in SMALL_PRIMES:
+        if p * p > N:
+            break
+        while N % p == 0:
+            factors.append(p)
+            N //= p
+
+    unsplit = [N] if N > 1 else []
+    while unsplit:
+        m = unsplit.pop()
+        if baillie_psw(m) == 'prime':
+            factors.append(m)
+            continue
+        root = math.isqrt(m)
+        if root * root == m: # Both methods below are slow on squares, and a square splits for free.
+            unsplit += [root, root]
+            continue
+        d = pollard_p_minus_1(m)
+        if d is None:
+            d = pollard_brent(m, rng, maxSteps)
+        if d is None:
+            raise FactorizationError(sorted(factors), m * math.prod(unsplit))
+        unsplit += [d, m // d]
+    return sorted(factors)
+
+
+def pollard_p_minus_1(N, bound=P_MINUS_1_BOUND):
+    # Stage one of Pollard's p-1. Raising 2 to every prime power up to the bound makes a = 2^E with p - 1 dividing E
+    # for any prime p | N whose p - 1 is bound-smooth, and then p divides gcd(a - 1, N). Returns a nontrivial
+    # factor of N, or None when no prime factor has a smooth enough p - 1 (or all of them do at once).
+    a = 2
+    for exponent in _prime_power_blocks(bound):
+        a = mod_exp(a, exponent, N)
+        g = math.gcd(a - 1, N)
+        if g == N:
+            return None
+        if g > 1:
+            return g
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _prime_power_blocks(bound):
+    # The largest power of each prime up to the bound, multiplied together in blocks of 64 primes. p-1 does one
+    # mod_exp and one gcd per block, which keeps the per-call overhead low while still stopping early.
+    powers = [p ** int(math.log(bound, p)) for p in _small_primes(bound + 1)]
+    return tuple(math.prod(powers[i:i + 64]) for i in range(0, len(powers), 64))
+
+
+def pollard_brent(N, rng=random, maxSteps=None):
+    # Brent's variant of Pollard's rho for an odd composite N. It iterates
+    # y -> y^2 + c (mod N), doubling the cycle-search window each time and batching RHO_BATCH differences per gcd.
+    # If a batch overshoots (the gcd comes out as N), the last batch is replayed one step at a time, and if that
+    # still gives N a new constant c is tried. Expected O(sqrt(p)) steps for the smallest prime factor p. Returns a
+    # nontrivial factor of N, or None once maxSteps steps (counted over every c tried) have gone by without one.
+    steps = 0
+    while True:
+        y, c = rng.randrange(1, N), rng.randrange(1, N)
+        g = r = q = 1
+        while g == 1:
+            if maxSteps is not None and steps >= maxSteps:
+                return None
+            steps += 2 * r # r steps to move x ahead, then r more compared against it
+            x = y
+            for i in range(r):
+                y = (y * y + c) % N
+            done = 0
+            while done < r and g == 1:
+                ys = y
+                for i in range(min(RHO_BATCH, r - done)):
+                    y = (y * y + c) % N
+                    q = (q * abs(x - y)) % N
+                g = math.gcd(q, N)
+                done += RHO_BATCH
+            r *= 2
+        if g == N:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % N
+                g = math.gcd(abs(x - ys), N)
+        if g != N:
+            return g
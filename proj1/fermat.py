@@ -1,13 +1,103 @@
+import collections
+import concurrent.futures
+import hashlib
+import math
+import mmap
+import multiprocessing
+import operator
+import os
 import random
+import struct
 
 
-def prime_test(N, k):
-	# This is main function, that is connected to the Test button. You don't need to touch it.
-	return fermat(N,k), miller_rabin(N,k)
+def prime_test(N, k, workers=None, seed=None):
+	# This is main function, that is connected to the Test button.
+	# With workers > 1 the k rounds of each test are spread over a process pool instead (see parallel_prime_test).
+	# With a seed, each test draws its witnesses from its own seed '<seed>:<test>', so the answer is reproducible.
+	if workers is not None and workers > 1:
+		return parallel_prime_test(N, k, workers, seed)
+	if seed is None:
+		return fermat(N,k), miller_rabin(N,k)
+	return fermat(N,k,seed='{}:fermat'.format(seed)), miller_rabin(N,k,seed='{}:miller_rabin'.format(seed))
 
-def mod_exp(x, y, N):
-    # You will need to implement this function and change the return value.   
-    # Input: Two n−bit integers x and N, an integer exponent y
+def mod_exp(x, y, N, multiply=operator.mul):
+    # Input: Two n-bit integers x and N, an integer exponent y
+    # Output: x^y mod N
+    # multiply is the multiplication primitive; any function from multiplication.py can be passed in for huge N.
+
+    # Iterative left-to-right sliding-window exponentiation. Instead of recursing once per bit of y, we walk the
+    # bits of y from the top down, squaring once per bit and multiplying in a precomputed odd power of x once per
+    # window of up to w bits. Every product is reduced mod N straight away, so no intermediate grows past 2n bits.
+    # The total is still O(n^3) (n squarings of O(n^2) each), but with roughly n/(w+1) multiplies instead of n/2,
+    # no recursion depth limit, and no unreduced z**2 values.
+
+    if y < 0:
+        raise ValueError('mod_exp does not support negative exponents')
+    if y == 0:
+        return 1 % N # This is O(1) because it just spits out a value.
+
+    x %= N
+    windows, trailingSquarings = _exponent_windows(y)
+    oddPowers = _odd_powers(x, max(index for squarings, index in windows) + 1, lambda a, b: multiply(a, b) % N)
+
+    # The first window starts from 1, so its squarings are skipped and we begin at its odd power directly.
+    result = oddPowers[windows[0][1]]
+    for squarings, index in windows[1:]:    # Together these loops square once per bit of y, so O(n) times.
+        for step in range(squarings):
+            result = multiply(result, result) % N
+        result = multiply(result, oddPowers[index]) % N
+    for step in range(trailingSquarings):   # Zero bits below the last window are just squarings.
+        result = multiply(result, result) % N
+    return result
+
+
+def _exponent_windows(y):
+    # Splits the exponent y (y > 0) into sliding windows, reading its bits from the top down. Each window is
+    # returned as (squarings, index): square the running result `squarings` times, then multiply it by the odd
+    # power x^(2*index + 1). Zero bits between windows are folded into the next window's squaring count, and the
+    # zero bits below the last window are returned separately. This runs in O(n) time for an n-bit exponent.
+    w = _window_size(y.bit_length())
+    windows = []
+    squarings = 0
+    i = y.bit_length() - 1
+    while i >= 0:
+        if not (y >> i) & 1:
+            squarings += 1
+            i -= 1
+        else:
+            # Find the longest window y[i..j] of at most w bits that ends in a 1 bit, so its value is odd.
+            j = max(i - w + 1, 0)
+            while not (y >> j) & 1:
+                j += 1
+            squarings += i - j + 1
+            windows.append((squarings, ((y >> j) & ((1 << (i - j + 1)) - 1)) >> 1))
+            squarings = 0
+            i = j - 1
+    return windows, squarings
+
+
+def _odd_powers(x, count, mul):
+    # Precomputes the odd powers x^1, x^3, ..., x^(2*count - 1) with the given modular multiply. There are at most
+    # 2^(w-1) of them, which is O(1) next to the n squarings of an exponentiation because w grows with log(n).
+    x2 = mul(x, x)
+    oddPowers = [x]
+    for i in range(count - 1):
+        oddPowers.append(mul(oddPowers[-1], x2))
+    return oddPowers
+
+
+def _window_size(bits):
+    # Picks the sliding window width from the exponent bit length. Wider windows save multiplications but cost
+    # 2^(w-1) precomputed powers, so the sweet spot grows slowly with the size of the exponent.
+    for w, limit in enumerate((8, 24, 80, 240, 672, 1792), start=1):
+        if bits <= limit:
+            return w
+    return 7
+
+
+def mod_exp_recursive(x, y, N):
+    # The original recursive square-and-multiply. It is kept only so the benchmark can compare against it.
+    # Input: Two n-bit integers x and N, an integer exponent y
     # Output: x^y mod N
 
     # The total is O(n^3) because multiplication (O(n^2)) happens n times, so O(n(n^2))
@@ -15,12 +105,101 @@ def mod_exp(x, y, N):
     if y == 0: 
         return 1 # This is O(1) because it just spits out a value.
     else:
-        z = mod_exp(x, y//2, N) # This recursion brings in O(n) because this occurs once per bit of Y
+        z = mod_exp_recursive(x, y//2, N) # This recursion brings in O(n) because this occurs once per bit of Y
         if (y % 2 == 0):
             return ((z**2) % N) # z**2 is a multiplication, which is O(n^2)
         else:
             return ((x * (z**2)) % N)
-	
+
+
+# Moduli at least this many bits long use Montgomery reduction in ModContext. Below it, CPython's builtin big-int
+# division is faster than the two extra multiplications a Montgomery reduction costs, so plain % is used instead.
+# Measured with ModContext.pow(a, N-1) on CPython 3.11: plain % is about 13% faster at 2048 bits, Montgomery is
+# about 7% faster from 2112 bits on, and 25-50% faster from 5k to 16k bits. The crossover sits where CPython
+# switches its multiplications to Karatsuba (70 30-bit digits, 2100 bits), while its division stays quadratic.
+MONTGOMERY_MIN_BITS = 2100
+
+
+class ModContext:
+    # Arithmetic mod a single N that is reused across many exponentiations (e.g. every witness of a primality
+    # test). Everything that only depends on N is computed once here: the Montgomery constants R, N' and R^2 mod N,
+    # and the sliding-window schedule of every exponent used so far.
+
+    def __init__(self, N, montgomery=None):
+        if N < 1:
+            raise ValueError('ModContext needs a positive modulus')
+        self.N = N
+        self.bits = N.bit_length()
+        self._windows = {}
+
+        # Montgomery form needs gcd(R, N) = 1, and R is a power of two, so it only exists for odd N > 1.
+        if N % 2 == 1 and N > 1:
+            self.R = 1 << self.bits
+            self.mask = self.R - 1
+            self.Nprime = (-_inverse_mod_power_of_two(N, self.bits)) & self.mask # N * N' = -1 mod R
+            self.R2 = (1 << (2 * self.bits)) % N                                  # R^2 mod N
+        else:
+            self.R = None
+        if montgomery is None:
+            montgomery = self.bits >= MONTGOMERY_MIN_BITS
+        self.montgomery = montgomery and self.R is not None
+
+    def _redc(self, T):
+        # Montgomery reduction: for 0 <= T < N*R, returns T * R^-1 mod N using only a mask, two multiplications
+        # and a shift, which replaces the O(n^2) long division that % N would do.
+        m = ((T & self.mask) * self.Nprime) & self.mask
+        t = (T + m * self.N) >> self.bits
+        return t - self.N if t >= self.N else t
+
+    def mul(self, a, b):
+        # Returns a * b mod N for ordinary residues a and b.
+        if self.montgomery:
+            return self._redc(self._redc((a % self.N) * (b % self.N)) * self.R2)
+        return (a * b) % self.N
+
+    def pow(self, a, e):
+        # Returns a^e mod N. This is the same sliding-window walk as mod_exp, but the window schedule of e is cached
+        # per context, and in Montgomery mode every step reduces with _redc instead of a division.
+        if e < 0:
+            raise ValueError('ModContext.pow does not support negative exponents')
+        if e == 0:
+            return 1 % self.N
+        if e not in self._windows:
+            self._windows[e] = _exponent_windows(e)
+        windows, trailingSquarings = self._windows[e]
+
+        if self.montgomery:
+            reduce = self._redc
+            a = reduce((a % self.N) * self.R2)     # Move a into Montgomery form, a*R mod N.
+        else:
+            N = self.N
+            reduce = lambda T: T % N
+            a %= N
+        oddPowers = _odd_powers(a, max(index for squarings, index in windows) + 1, lambda x, y: reduce(x * y))
+
+        result = oddPowers[windows[0][1]]
+        for squarings, index in windows[1:]:
+            for step in range(squarings):
+                result = reduce(result * result)
+            result = reduce(result * oddPowers[index])
+        for step in range(trailingSquarings):
+            result = reduce(result * result)
+
+        if self.montgomery:
+            return reduce(result)                  # Leave Montgomery form, result*R^-1 mod N.
+        return result
+
+
+def _inverse_mod_power_of_two(N, bits):
+    # Returns N^-1 mod 2^bits for odd N with Newton's iteration. Any odd N is its own inverse mod 8, and each
+    # step x = x(2 - Nx) doubles the number of correct low bits, so this takes O(log n) multiplications.
+    inverse = N & 7
+    correctBits = 3
+    while correctBits < bits:
+        correctBits *= 2
+        inverse = (inverse * (2 - N * inverse)) & ((1 << correctBits) - 1)
+    return inverse & ((1 << bits) - 1)
+
 
 def fprobability(k):
     # This function runs at a time of O(1) and returns a value corresponding to our spec for Fermat's Test   
@@ -32,37 +211,424 @@ def mprobability(k):
     return 1 - (0.25**k)
 
 
-def fermat(N,k):
+def random_witnesses(N, count, rng=random, seed=None):
+    # Returns `count` witnesses drawn uniformly from [2, N-2], for N >= 4. 1 and N-1 are left out because they pass
+    # both tests for every odd N, so a round spent on them proves nothing. All the random bits for the batch come
+    # from a single getrandbits call and are cut into byte-aligned slices; a slice that lands past N-2 is thrown
+    # away and redrawn in the next batch, which happens less than half the time. With a seed, the witnesses come
+    # from a fresh random.Random(seed), so the same seed gives the same batch. O(count * n) time.
+    if seed is not None:
+        rng = random.Random(seed)
+    span = N - 3 # How many values [2, N-2] holds.
+    width = (span.bit_length() + 7) // 8
+    mask = (1 << span.bit_length()) - 1
+    witnesses = []
+    while len(witnesses) < count:
+        needed = count - len(witnesses)
+        pool = rng.getrandbits(8 * width * needed).to_bytes(width * needed, 'little')
+        for i in range(0, len(pool), width):
+            value = int.from_bytes(pool[i:i + width], 'little') & mask
+            if value < span:
+                witnesses.append(value + 2)
+    return witnesses
+
+
+def fermat(N,k,rng=random,seed=None,witnesses=None):
     # A function that takes in a number N and a loop count k and returns whether N is prime or composite
-    
-    for i in range(k): # This for loop runs the test k times, coming out to a Time complexity of O(1)
-        a = random.randint(1, N-1) # This pulls a random integer into the variable a for use with Fermat's theorem.
-                                   # We'll assume this runs in O(1) time and takes no space.
-        if (mod_exp(a, N-1, N) != 1): # If Fermat's thoorem is not satisfied, N is for sure composite.
-            return 'composite'        # The Mod_Exp function runs in O(n^3) time
+    # The k witnesses are drawn in one batch by random_witnesses (from rng, or from seed if one is given), unless a
+    # precomputed batch is passed in as witnesses, in which case every one of those is used instead.
+
+    if N < 4: # [2, N-2] is empty, and these are easy to decide directly.
+        return 'prime' if N >= 2 else 'composite'
+    if witnesses is None:
+        witnesses = random_witnesses(N, k, rng, seed) # O(k*n) time for the whole batch.
+    context = ModContext(N) # Everything that only depends on N is set up once and shared by all k rounds.
+    for a in witnesses: # This for loop runs the test k times, coming out to a Time complexity of O(1)
+        if (context.pow(a, N-1) != 1): # If Fermat's thoorem is not satisfied, N is for sure composite.
+            return 'composite'         # The exponentiation runs in O(n^3) time
     
     else: # If we make it out of our loop through running Fermat's theorem and we still haven't failed, we conclude Primality.
 	    return 'prime'
 
 
-def miller_rabin(N,k):
+# Miller-Rabin is exact for every N below this bound when it uses the witness sets in DETERMINISTIC_WITNESSES.
+DETERMINISTIC_LIMIT = 2**64
+
+# (bound, witnesses): every odd composite N < bound fails the strong test for at least one of these witnesses.
+# Each row is the smallest known set for its range (Jaeschke; Sinclair for the last row), so small inputs need
+# only one to three exponentiations and every 64-bit input needs at most seven.
+DETERMINISTIC_WITNESSES = [
+    (2047, (2,)),
+    (1373653, (2, 3)),
+    (9080191, (31, 73)),
+    (4759123141, (2, 7, 61)),
+    (1122004669633, (2, 13, 23, 1662803)),
+    (2152302898747, (2, 3, 5, 7, 11)),
+    (3474749660383, (2, 3, 5, 7, 11, 13)),
+    (DETERMINISTIC_LIMIT, (2, 325, 9375, 28178, 450775, 9780504, 1795265022)),
+]
+
+
+def _split_power_of_two(M):
+    # Factors M > 0 as d * 2^s with d odd, returning (d, s). O(n) shifts for an n-bit M.
+    s = 0
+    while M % 2 == 0:
+        M //= 2
+        s += 1
+    return M, s
+
+
+def _strong_probable_prime(context, a, d, s):
+    # The strong test for one witness a, where N - 1 = d * 2^s and context is a ModContext for N. N passes when
+    # a^d = 1, or when one of a^d, a^(2d), ..., a^(2^(s-1) d) is -1 (which comes out as N - 1). This costs one
+    # exponentiation plus at most s - 1 squarings, O(n^3) in total.
+    N = context.N
+    x = context.pow(a, d)
+    if x == 1 or x == N - 1:
+        return True
+    for r in range(s - 1):
+        x = context.mul(x, x)
+        if x == N - 1:
+            return True
+        if x == 1: # 1 reached without passing through -1, so the previous value was a nontrivial square root of 1.
+            return False
+    return False
+
+
+def miller_rabin_deterministic(N):
+    # Exact Miller-Rabin for 0 <= N < 2^64. It picks the smallest witness set that covers N from
+    # DETERMINISTIC_WITNESSES, makes no random calls, and its 'prime' answer is definitive rather than probable.
+    if N >= DETERMINISTIC_LIMIT:
+        raise ValueError('miller_rabin_deterministic only covers N < 2^64')
+    if N < 4:
+        return 'prime' if N >= 2 else 'composite'
+    if N % 2 == 0:
+        return 'composite'
+
+    d, s = _split_power_of_two(N - 1)
+    context = ModContext(N)
+    for bound, witnesses in DETERMINISTIC_WITNESSES:
+        if N < bound:
+            break
+    for a in witnesses:
+        if not _strong_probable_prime(context, a, d, s):
+            return 'composite'
+    return 'prime'
+
+
+def miller_rabin(N,k,rng=random,seed=None,witnesses=None):
     # A function that takes in a number N and a loop count k and returns whether N is prime or composite
+    # Above 2^64 the witnesses are drawn or passed in exactly as for fermat.
 
-    for i in range(k):          # This loop takes place k times, running at constant time.
-        a = random.randint(1,N-1) # This pulls a random integer into the variable a for use with Fermat's theorem.
-                                  # We'll assume this runs in O(1) time and takes no space.
+    if N < DETERMINISTIC_LIMIT: # Below 2^64 a fixed set of witnesses gives an exact answer, so no rounds are drawn.
+        return miller_rabin_deterministic(N)
+    if N % 2 == 0:
+        return 'composite'
 
-        output = mod_exp(a, N-1, N) # This is our first primality test ran. It runs in O(n^3) time and O(n^2) space.
-        if (output != 1):           # If our initial primality test fails, we return composite.
+    d, s = _split_power_of_two(N - 1) # N-1 = d * 2^s is factored once, in O(n) time, and shared by every round.
+    context = ModContext(N)           # So is everything else that only depends on N.
+    if witnesses is None:
+        witnesses = random_witnesses(N, k, rng, seed) # O(k*n) time for the whole batch.
+    for a in witnesses:               # This loop takes place k times, running at constant time.
+        # One exponentiation a^d followed by at most s-1 squarings, instead of a fresh exponentiation for every
+        # halving of the exponent. This is O(n^3) time and O(n) space per round.
+        if not _strong_probable_prime(context, a, d, s):
             return 'composite'
-        M = (N-1)//2                # M is a placeholder for our modified exponent value. This and other divisions take O(n^2) time and O(n) space.
-        
-        while ((output == 1) and ((M % 2) == 0)): # So long as our output of the Mod_Exp function is 1 and our exponent is even, continue to loop through...
-            output = mod_exp(a, M, N)             # This operation is our next primality test on the square-rooted version of our original equation.
-            M //= 2                               # This operation takes O(n^3) time and O(n^2) space in total including the division operation.
-        else:
-            if ((output != 1) and (output != (N-1))): # At the end of our loop, our output value must be 1 or -1, or our number is composite. 
-                                                      # When our Mod_Exp function mearns to return a -1, it actually returns N-1. 
-                return 'composite'
-    else: # If we make it out of our loop through running Fermat's theorem and we still haven't failed, we conclude Primality.
-        return 'prime'
\ No newline at end of file
+    else: # If we make it out of our loop and no witness has proven N composite, we conclude Primality.
+        return 'prime'
+
+
+def mr_confidence(N, k):
+    # The probability that a 'prime' answer from miller_rabin(N, k) is right. It is exactly 1 below 2^64, where the
+    # fixed witness sets make the test deterministic, and mprobability(k) otherwise. O(1) time.
+    if N < DETERMINISTIC_LIMIT:
+        return 1.0
+    return mprobability(k)
+
+
+def baillie_psw(N):
+    # Baillie-PSW: a strong base-2 Miller-Rabin test followed by a strong Lucas test. No composite is known to pass
+    # both, and it always costs the same (about three exponentiations' worth of O(n^3) work) however sure we want
+    # to be, so it replaces k rounds of the random tests with one fixed-cost check. Returns 'prime' or 'composite'.
+    verdict = screen_small_factors(N) # Small factors are far cheaper to find by gcd than by either test.
+    if verdict is not None:
+        return verdict
+
+    d, s = _split_power_of_two(N - 1)
+    if not _strong_probable_prime(ModContext(N), 2, d, s):
+        return 'composite'
+    if math.isqrt(N) ** 2 == N: # A perfect square has no D with Jacobi(D/N) = -1, so the search below would not end.
+        return 'composite'
+
+    # Selfridge's parameters: the first D in 5, -7, 9, -11, ... with Jacobi(D/N) = -1, then P = 1, Q = (1-D)/4.
+    D = 5
+    while True:
+        j = jacobi(D, N)
+        if j == -1:
+            break
+        if j == 0 and abs(D) != N: # D shares a factor with N.
+            return 'composite'
+        D = -D - 2 if D > 0 else -D + 2
+    return 'prime' if _strong_lucas_probable_prime(N, D, 1, (1 - D) // 4) else 'composite'
+
+
+def jacobi(a, n):
+    # The Jacobi symbol (a/n) for odd n > 0, computed with quadratic reciprocity in O(n^2) time. Returns -1, 0 or 1.
+    a %= n
+    result = 1
+    while a != 0:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def _strong_lucas_probable_prime(N, D, P, Q):
+    # The strong Lucas test with parameters (P, Q), D = P^2 - 4Q. Writing N + 1 = d * 2^s, N passes when U_d = 0,
+    # or when V_(d * 2^r) = 0 for some 0 <= r < s. U_d and V_d are built with the binary doubling rules, one step
+    # per bit of d, so this is O(n) steps of O(n^2) multiplications like an exponentiation.
+    d, s = _split_power_of_two(N + 1)
+    half = (N + 1) // 2 # The inverse of 2 mod N, for the halvings in the add-one step.
+
+    U, V, Qk = 1, P % N, Q % N # U_1, V_1 and Q^1
+    for bit in bin(d)[3:]:
+        U, V, Qk = (U * V) % N, (V * V - 2 * Qk) % N, (Qk * Qk) % N # Index doubles: U_2k, V_2k, Q^2k
+        if bit == '1':
+            U, V = ((P * U + V) * half) % N, ((D * U + P * V) * half) % N # Index goes up by one.
+            Qk = (Qk * Q) % N
+
+    if U == 0 or V == 0:
+        return True
+    for r in range(s - 1):
+        V, Qk = (V * V - 2 * Qk) % N, (Qk * Qk) % N
+        if V == 0:
+            return True
+    return False
+
+
+# ---------------- Parallel rounds ----------------
+
+# The stop flags of the pool worker this process is running as, one per test, set up by _init_round_worker.
+_roundStopEvents = None
+
+
+def _init_round_worker(stopEvents):
+    global _roundStopEvents
+    _roundStopEvents = stopEvents
+
+
+def _witness_rounds(testName, N, rounds, seed):
+    # Runs one worker's share of the rounds of fermat or miller_rabin with its own seeded generator. Every worker
+    # checks its test's stop flag before each round and sets it when it proves N composite, so the other workers
+    # give up after at most one more exponentiation. Returns 'composite', 'prime', or None if it was stopped.
+    test = fermat if testName == 'fermat' else miller_rabin
+    stopEvent = _roundStopEvents[testName]
+    rng = random.Random(seed)
+    for i in range(rounds):
+        if stopEvent.is_set():
+            return None
+        if test(N, 1, rng) == 'composite':
+            stopEvent.set()
+            return 'composite'
+    return 'prime'
+
+
+def parallel_prime_test(N, k, workers, seed=None):
+    # prime_test with the k rounds of each test split across a pool of worker processes. Worth it once a single
+    # round costs milliseconds (N of 2048 bits and up); below that, starting the pool costs more than it saves.
+    # Worker i of a test draws its witnesses from random.Random('<seed>:<test>:<i>'), so a given seed and worker
+    # count always try the same witnesses. Returns the same (fermat, miller_rabin) pair as prime_test.
+    if seed is None:
+        seed = random.getrandbits(64)
+    shares = [k // workers + (1 if i < k % workers else 0) for i in range(workers)]
+    shares = [rounds for rounds in shares if rounds > 0]
+
+    if N < 4 or N % 2 == 0: # Too small to draw witnesses from, or even, so both answers are immediate.
+        return fermat(N, k), miller_rabin(N, k)
+    testNames = ['fermat']
+    mrVerdict = None
+    if N < DETERMINISTIC_LIMIT:
+        mrVerdict = miller_rabin_deterministic(N) # Exact and needs no rounds, so there is nothing to spread out.
+    else:
+        testNames.append('miller_rabin')
+
+    stopEvents = {name: multiprocessing.Event() for name in testNames}
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_round_worker,
+                                                initargs=(stopEvents,)) as pool:
+        futures = {name: [pool.submit(_witness_rounds, name, N, rounds, '{}:{}:{}'.format(seed, name, i))
+                          for i, rounds in enumerate(shares)]
+                   for name in testNames}
+        verdicts = {name: 'composite' if any(f.result() == 'composite' for f in futures[name]) else 'prime'
+                    for name in testNames}
+    return verdicts['fermat'], verdicts.get('miller_rabin', mrVerdict)
+
+
+# ---------------- Batch screening ----------------
+
+# Candidates are screened against every prime below this bound before any exponentiation is spent on them.
+SMALL_PRIME_LIMIT = 4096
+
+
+def _small_primes(limit):
+    # Sieve of Eratosthenes for every prime below limit. O(limit log log limit) time and O(limit) space.
+    sieve = bytearray([1]) * limit
+    sieve[0:2] = b'\x00\x00'
+    for p in range(2, math.isqrt(limit - 1) + 1):
+        if sieve[p]:
+            sieve[p*p::p] = bytes(len(range(p*p, limit, p)))
+    return [p for p in range(limit) if sieve[p]]
+
+
+def _primorial_blocks(primes, blockBits):
+    # Groups consecutive primes into products of about blockBits bits each. The smallest primes land in the first
+    # block, which rejects the most candidates, so most composites are thrown out by the very first gcd.
+    blocks = [1]
+    for p in primes:
+        if blocks[-1].bit_length() >= blockBits:
+            blocks.append(1)
+        blocks[-1] *= p
+    return blocks
+
+
+SMALL_PRIMES = _small_primes(SMALL_PRIME_LIMIT)
+SMALL_PRIME_SET = frozenset(SMALL_PRIMES)
+PRIMORIALS = _primorial_blocks(SMALL_PRIMES, 2048)
+
+
+def screen_small_factors(N):
+    # Decides N from the small-prime table alone when possible. Returns 'prime' or 'composite' if that settles it,
+    # and None if N has no small factor but is too big for that to prove it prime. Each gcd against a primorial
+    # block is one O(n) C-level call, so this is far cheaper than a single exponentiation.
+    if N < 2:
+        return 'composite'
+    if N < SMALL_PRIME_LIMIT:
+        return 'prime' if N in SMALL_PRIME_SET else 'composite'
+    for primorial in PRIMORIALS:
+        if math.gcd(N, primorial) != 1:
+            return 'composite'
+    if N < SMALL_PRIME_LIMIT * SMALL_PRIME_LIMIT: # No prime factor up to sqrt(N), so N is prime.
+        return 'prime'
+    return None
+
+
+def prime_test_batch(candidates, k):
+    # Tests every N in candidates and returns a bytearray with 1 where N is prime and 0 where it is composite.
+    # Candidates with a small factor are thrown out by screen_small_factors, and only the survivors pay for the
+    # Fermat and Miller-Rabin rounds. A survivor is marked prime only if both tests say 'prime', as prime_test does.
+    results = bytearray()
+    for N in candidates:
+        verdict = screen_small_factors(N)
+        if verdict is None:
+            verdict = 'prime' if fermat(N, k) == 'prime' and miller_rabin(N, k) == 'prime' else 'composite'
+        results.append(verdict == 'prime')
+    return results
+
+
+# ---------------- Verdict cache ----------------
+
+# One on-disk cache slot: a 16-byte key digest, k (or COMPOSITE_K), the verdict (1 = prime) and its certainty.
+_CACHE_RECORD = struct.Struct('<16sIBxxxd')
+
+# Stands in for k on composite verdicts, which are proofs and so answer a query at any k.
+COMPOSITE_K = 0xFFFFFFFF
+
+
+class VerdictCache:
+    # A bounded cache of primality verdicts keyed on (N, test, k), where test is 'fermat' or 'miller_rabin'.
+    # Composite verdicts are stored once per (N, test) and reused at any k. The newest maxsize entries stay in
+    # memory, evicting the least recently used first. With a path, verdicts are also written to a memory-mapped
+    # table of `slots` fixed-size records, each key hashed to one slot (a newer key overwrites an older one), so
+    # the table can be shared between runs and processes. Lookups and stores are O(1). maxsize=0 with a path keeps
+    # nothing in memory and serves every lookup from the table.
+
+    def __init__(self, maxsize=65536, path=None, slots=1 << 20):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._table = None
+        if path is not None:
+            self._file = open(path, 'a+b')
+            if os.path.getsize(path) < slots * _CACHE_RECORD.size:
+                self._file.truncate(slots * _CACHE_RECORD.size)
+            self._table = mmap.mmap(self._file.fileno(), slots * _CACHE_RECORD.size)
+            self.slots = slots
+
+    def get(self, N, test, k):
+        # Returns (verdict, certainty) for the query, or None if neither the memory nor the disk table has it.
+        for key in ((N, test, COMPOSITE_K), (N, test, k)):
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            elif self._table is not None:
+                entry = self._read_slot(key)
+                if entry is not None:
+                    self._remember(key, entry) # Already the newest, or dropped straight away when maxsize is 0
+            if entry is not None:
+                self.hits += 1
+                return entry
+        self.misses += 1
+        return None
+
+    def put(self, N, test, k, verdict, certainty):
+        key = (N, test, COMPOSITE_K if verdict == 'composite' else k)
+        self._remember(key, (verdict, certainty))
+        if self._table is not None:
+            digest = self._digest(key)
+            offset = self._slot_offset(digest)
+            self._table[offset:offset + _CACHE_RECORD.size] = _CACHE_RECORD.pack(digest, key[2],
+                                                                                  verdict == 'prime', certainty)
+
+    def close(self):
+        if self._table is not None:
+            self._table.close()
+            self._file.close()
+            self._table = None
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _read_slot(self, key):
+        digest = self._digest(key)
+        offset = self._slot_offset(digest)
+        storedDigest, storedK, isPrime, certainty = _CACHE_RECORD.unpack_from(self._table, offset)
+        if storedDigest != digest or storedK != key[2]:
+            return None
+        return ('prime' if isPrime else 'composite'), certainty
+
+    @staticmethod
+    def _digest(key):
+        N, test, k = key
+        return hashlib.blake2b('{}:{}:{:d}'.format(test, k, N).encode(), digest_size=16).digest()
+
+    def _slot_offset(self, digest):
+        return (int.from_bytes(digest[:8], 'little') % self.slots) * _CACHE_RECORD.size
+
+
+# The cache used by cached_prime_test when none is passed in.
+PRIME_CACHE = VerdictCache()
+
+
+def cached_prime_test(N, k, cache=None):
+    # prime_test through a VerdictCache: each test is only run when the cache has no verdict for it, and new
+    # verdicts are stored along with their certainty (1.0 for composites and deterministic Miller-Rabin).
+    if cache is None:
+        cache = PRIME_CACHE
+    verdicts = []
+    tests = (('fermat', fermat, fprobability(k)), ('miller_rabin', miller_rabin, mr_confidence(N, k)))
+    for test, run, certainty in tests:
+        entry = cache.get(N, test, k)
+        if entry is None:
+            verdict = run(N, k)
+            entry = (verdict, 1.0 if verdict == 'composite' else certainty)
+            cache.put(N, test, k, *entry)
+        verdicts.append(entry[0])
+    return tuple(verdicts)
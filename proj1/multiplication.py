@@ -0,0 +1,100 @@
+# Big-integer multiplication algorithms. Each one takes two integers and returns their product, so any of them can
+# be passed to mod_exp as its multiplication primitive. The divide-and-conquer versions recurse until the operands
+# are small enough that the builtin * (C code) is faster than another level of splitting.
+
+import operator
+
+
+# Operands shorter than these many bits (the smaller of the two) go straight to the builtin multiplication.
+# From the cutoff sweep in `python3 benchmark.py --multiply` (CPython 3.11): the builtin * is already Karatsuba in
+# C, so Python-level Karatsuba is slower than it at every cutoff, 1.7-2.8x at 1k bits and 1-6% at 2^15, where it
+# still recurses on large operands. Toom-3 with a 2^15 cutoff is 10% faster than the builtin at 100k bits, 16% at
+# 200k and 35% at 1M bits, the best or tied for best of the cutoffs swept; below about 100k bits nothing beats
+# the builtin.
+KARATSUBA_CUTOFF = 1 << 15
+TOOM3_CUTOFF = 1 << 15
+
+
+def multiply_iterative(x, y):
+    # Shift-and-add multiplication, the loop form of the recursive multiply in PythonStartup/test.py.
+    # One addition of an O(n)-bit number per bit of y, so O(n^2) time and O(n) space, with no recursion.
+    sign = -1 if (x < 0) != (y < 0) else 1
+    x, y = abs(x), abs(y)
+    result = 0
+    shift = 0
+    while y:
+        if y & 1:
+            result += x << shift
+        y >>= 1
+        shift += 1
+    return sign * result
+
+
+def karatsuba(x, y, cutoff=KARATSUBA_CUTOFF):
+    # Splits each operand in two halves of k bits and gets the product from three half-size products instead of
+    # four: x*y = z2*2^2k + (z1 - z2 - z0)*2^k + z0. That gives O(n^log2(3)) = O(n^1.585) time and O(n) space.
+    sign = -1 if (x < 0) != (y < 0) else 1
+    x, y = abs(x), abs(y)
+    bits = min(x.bit_length(), y.bit_length())
+    if bits < cutoff:
+        return sign * (x * y)
+
+    k = max(x.bit_length(), y.bit_length()) // 2
+    mask = (1 << k) - 1
+    x1, x0 = x >> k, x & mask
+    y1, y0 = y >> k, y & mask
+    z0 = karatsuba(x0, y0, cutoff)
+    z2 = karatsuba(x1, y1, cutoff)
+    z1 = karatsuba(x0 + x1, y0 + y1, cutoff) - z2 - z0
+    return sign * ((z2 << (2 * k)) + (z1 << k) + z0)
+
+
+def toom3(x, y, cutoff=TOOM3_CUTOFF):
+    # Toom-Cook 3-way: each operand is a degree-2 polynomial in 2^k, which is evaluated at 0, 1, -1, -2 and
+    # infinity. Five third-size products are interpolated back (Bodrato's sequence, whose divisions by 2 and 3 are
+    # exact) into the product, so this is O(n^log3(5)) = O(n^1.465) time and O(n) space.
+    sign = -1 if (x < 0) != (y < 0) else 1
+    x, y = abs(x), abs(y)
+    bits = min(x.bit_length(), y.bit_length())
+    if bits < cutoff:
+        return sign * (x * y)
+
+    k = (max(x.bit_length(), y.bit_length()) + 2) // 3
+    mask = (1 << k) - 1
+    x0, x1, x2 = x & mask, (x >> k) & mask, x >> (2 * k)
+    y0, y1, y2 = y & mask, (y >> k) & mask, y >> (2 * k)
+
+    # Evaluation
+    xSum, ySum = x0 + x2, y0 + y2
+    r0 = toom3(x0, y0, cutoff)
+    r1 = toom3(xSum + x1, ySum + y1, cutoff)
+    rMinus1 = toom3(xSum - x1, ySum - y1, cutoff)
+    rMinus2 = toom3(x0 - 2 * x1 + 4 * x2, y0 - 2 * y1 + 4 * y2, cutoff)
+    rInf = toom3(x2, y2, cutoff)
+
+    # Interpolation
+    c3 = (rMinus2 - r1) // 3
+    c1 = (r1 - rMinus1) // 2
+    c2 = rMinus1 - r0
+    c3 = (c2 - c3) // 2 + 2 * rInf
+    c2 = c2 + c1 - rInf
+    c1 = c1 - c3
+    return sign * ((rInf << (4 * k)) + (c3 << (3 * k)) + (c2 << (2 * k)) + (c1 << k) + r0)
+
+
+def multiply(x, y):
+    # Picks the multiplication for the operand size: Toom-3 once both operands reach TOOM3_CUTOFF bits, the
+    # builtin * below that.
+    if min(x.bit_length(), y.bit_length()) >= TOOM3_CUTOFF:
+        return toom3(x, y)
+    return x * y
+
+
+# Every variant by name, for the benchmark and for picking a primitive to pass to mod_exp.
+MULTIPLIERS = {
+    'builtin': operator.mul,
+    'iterative': multiply_iterative,
+    'karatsuba': karatsuba,
+    'toom3': toom3,
+    'multiply': multiply,
+}
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+# Headless command-line front end for the primality tests in fermat.py, for batch machines without a display.
+# Reads one integer per line from files or stdin and writes one JSON object per line (NDJSON) to stdout:
+#
+#   python3 primality_cli.py -k 20 numbers.txt > verdicts.ndjson
+#   seq 1 1000000 | python3 primality_cli.py --workers 8
+#
+# Input is read in chunks and at most --max-pending chunks are in flight at once, so memory stays flat however
+# large the input is. Output keeps the input order. Only fermat.py is imported, never PyQt.
+
+import argparse
+import collections
+import concurrent.futures
+import itertools
+import json
+import os
+import sys
+
+from fermat import fprobability, mr_confidence, prime_test
+
+
+def verdict_record(line, k):
+    # The NDJSON record for one input line. N is written as a string because many JSON readers turn integers
+    # above 2^53 into floats. Blank lines give None and bad lines give an error record instead of stopping the run;
+    # every record keeps the line under 'n', so error records only add 'error'.
+    text = line.strip()
+    if not text:
+        return None
+    try:
+        N = int(text)
+    except ValueError:
+        return {'n': text, 'error': 'not an integer'}
+    if N < 1:
+        return {'n': text, 'error': 'N must be positive'}
+    fermatVerdict, mrVerdict = prime_test(N, k)
+    return {
+        'n': str(N),
+        'fermat': fermatVerdict,
+        'fermat_probability': fprobability(k) if fermatVerdict == 'prime' else 1.0,
+        'miller_rabin': mrVerdict,
+        'miller_rabin_probability': mr_confidence(N, k) if mrVerdict == 'prime' else 1.0,
+    }
+
+
+def test_chunk(lines, k):
+    # One unit of pool work: the already-serialized NDJSON lines for a chunk of input lines.
+    records = (verdict_record(line, k) for line in lines)
+    return ''.join(json.dumps(record) + '\n' for record in records if record is not None)
+
+
+def chunked(lines, size):
+    iterator = iter(lines)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run(lines, out, k, workers, chunkSize, maxPending):
+    # Tests every line and writes its record to out, in input order. With more than one worker the chunks go to a
+    # process pool; once maxPending chunks are queued, the oldest one is waited for and written before more input
+    # is read, which bounds memory at about maxPending * chunkSize lines.
+    if workers <= 1:
+        for chunk in chunked(lines, chunkSize):
+            out.write(test_chunk(chunk, k))
+        return
+
+    pending = collections.deque()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in chunked(lines, chunkSize):
+            if len(pending) >= maxPending:
+                out.write(pending.popleft().result())
+            pending.append(pool.submit(test_chunk, chunk, k))
+        while pending:
+            out.write(pending.popleft().result())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Test integers for primality and write NDJSON verdicts.')
+    parser.add_argument('files', nargs='*', help='input files with one integer per line (default: stdin)')
+    parser.add_argument('-k', type=int, default=20, help='random rounds per test (default %(default)s)')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes; 1 runs in-process (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=256, help='input lines per unit of work')
+    parser.add_argument('--max-pending', type=int, default=None,
+                        help='chunks in flight at once (default: 4 per worker)')
+    args = parser.parse_args(argv)
+
+    maxPending = args.max_pending or 4 * args.workers
+    files = [open(name) for name in args.files] if args.files else [sys.stdin]
+    try:
+        run(itertools.chain.from_iterable(files), sys.stdout, args.k, args.workers, args.chunk_size, maxPending)
+    finally:
+        for f in files:
+            if f is not sys.stdin:
+                f.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import bisect
+import math
+
+from fermat import SMALL_PRIMES, SMALL_PRIME_LIMIT, _small_primes, miller_rabin
+
+
+# Wheel factorization mod 30: only the 8 residues coprime to 2, 3 and 5 can hold a prime above 5, so every
+# segment is stored as 8 residue rows instead of 30 numbers per wheel turn, skipping 73% of the integers outright.
+WHEEL = 30
+WHEEL_RESIDUES = (1, 7, 11, 13, 17, 19, 23, 29)
+
+# Number of wheel turns (30 integers each) held in memory per segment, about 8 * 2^15 bytes. A bounded range gets
+# a segment no longer than it needs, and an open-ended one (next_prime) starts at FIRST_SEGMENT_TURNS, about 40
+# times the average prime gap at 2^64, and doubles it on every segment up to SEGMENT_TURNS.
+SEGMENT_TURNS = 1 << 15
+FIRST_SEGMENT_TURNS = 1 << 6
+
+# When the whole range lies below MAX_SIEVE_PRIME^2 and is at least as wide as its square root, we sieve by every
+# prime up to that square root, so survivors are proven prime and miller_rabin is never needed. Otherwise the
+# small-prime table does the sieving: building and applying the full table costs O(sqrt(hi)) work, which a narrow
+# range does not win back from the miller_rabin calls it saves.
+MAX_SIEVE_PRIME = 1 << 20
+
+# With the small-prime table, a segment of t turns is only sieved by the primes up to SIEVE_PRIMES_PER_TURN * t.
+# Each sieving prime costs 8 slice assignments however short the segment is, while a larger prime removes few
+# enough survivors that miller_rabin on them is cheaper, so short segments use a short prefix of the table.
+SIEVE_PRIMES_PER_TURN = 2
+
+
+def _wheel_inverses():
+    # For each residue p coprime to 30, the m mod 30 with p * m = 1 (mod 30). O(1).
+    return {p: next(m for m in range(WHEEL) if (p * m) % WHEEL == 1) for p in WHEEL_RESIDUES}
+
+
+_WHEEL_INVERSE = _wheel_inverses()
+
+
+def primes_in_range(lo, hi=None, k=20):
+    # Yields every prime p with lo <= p < hi in increasing order, or every prime from lo on if hi is None.
+    # Numbers are sieved one segment at a time, so memory stays at one segment however wide the range is. Survivors
+    # that the sieve cannot prove prime (those at or above the square of the largest sieving prime) are passed to
+    # miller_rabin(p, k), which is exact below 2^64.
+    lo = max(lo, 2)
+    for p in (2, 3, 5):
+        if lo <= p and (hi is None or p < hi):
+            yield p
+
+    fullSieve = hi is not None and hi - 1 < MAX_SIEVE_PRIME ** 2 and hi - lo >= math.isqrt(hi)
+    if fullSieve:
+        sievePrimes = _small_primes(math.isqrt(hi - 1) + 1)[3:] if hi > 7 else []
+        provenBelow = hi
+    else:
+        sievePrimes = SMALL_PRIMES[3:]
+
+    base = (lo // WHEEL) * WHEEL
+    turns = FIRST_SEGMENT_TURNS
+    while hi is None or base < hi:
+        if hi is not None:
+            turns = min(SEGMENT_TURNS, -(-(hi - base) // WHEEL))
+        if fullSieve:
+            rows = _sieve_segment(base, turns, sievePrimes)
+        else:
+            # Every composite below the square of the first prime left out is still caught by the sieve.
+            used = bisect.bisect(sievePrimes, SIEVE_PRIMES_PER_TURN * turns)
+            rows = _sieve_segment(base, turns, sievePrimes[:used])
+            provenBelow = sievePrimes[used] ** 2 if used < len(sievePrimes) else SMALL_PRIME_LIMIT * SMALL_PRIME_LIMIT
+
+        # Interleave the 8 residue rows so that position 8i + j holds base + 30i + WHEEL_RESIDUES[j], which is
+        # increasing order, then jump from survivor to survivor with bytearray.find.
+        marks = bytearray(8 * turns)
+        for j in range(8):
+            marks[j::8] = rows[j]
+        position = marks.find(1)
+        while position != -1:
+            n = base + WHEEL * (position >> 3) + WHEEL_RESIDUES[position & 7]
+            if hi is not None and n >= hi:
+                return
+            if n >= lo and n > 5 and (n < provenBelow or miller_rabin(n, k) == 'prime'):
+                yield n
+            position = marks.find(1, position + 1)
+        base += WHEEL * turns
+        turns = min(2 * turns, SEGMENT_TURNS)
+
+
+def _sieve_segment(base, turns, sievePrimes):
+    # Sieves [base, base + 30 * turns) for a base that is a multiple of 30. Row j has one byte per wheel turn for
+    # the numbers base + 30i + WHEEL_RESIDUES[j], and is cleared wherever that number is a multiple of a sieving
+    # prime other than the prime itself. In row j the multiples of p are p bytes apart, so each (prime, row) pair is
+    # one slice assignment: O(turns * sum(1/p)) work per segment.
+    end = base + WHEEL * turns
+    rows = [bytearray([1]) * turns for j in range(8)]
+    if base == 0:
+        rows[0][0] = 0 # 1 is not prime.
+    for p in sievePrimes:
+        if p * p >= end:
+            break
+        smallestCofactor = max(p * p, -(-base // p) * p) // p # Smallest m with p*m in range and not p itself.
+        for j, r in enumerate(WHEEL_RESIDUES):
+            # p*m lands in row j exactly when m = r * p^-1 (mod 30).
+            m = smallestCofactor + (r * _WHEEL_INVERSE[p % WHEEL] - smallestCofactor) % WHEEL
+            start = (p * m - base) // WHEEL
+            if start < turns:
+                rows[j][start::p] = bytes(len(range(start, turns, p)))
+    return rows
+
+
+def next_prime(n, k=20):
+    # Returns the smallest prime greater than n.
+    return next(primes_in_range(n + 1, None, k))
@@ -0,0 +1,215 @@
+# NumPy engine that runs Fermat and Miller-Rabin witnesses for a whole block of candidates at once. Every step of
+# the square-and-multiply loop is one array-wide operation across the block, so the interpreter overhead is paid
+# once per exponent bit instead of once per bit per candidate.
+#
+# Products of two 63-bit residues need 126 bits, which no NumPy dtype holds, so the arithmetic is Montgomery
+# multiplication with R = 2^64: the 128-bit product is assembled from four 32 x 32-bit partial products, and the
+# reduction only ever needs its low and high 64-bit words. Candidates of 2^63 and up (where 2N would overflow a
+# uint64) and every candidate when NumPy is not installed go through the scalar fermat/miller_rabin instead.
+
+import random
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from fermat import DETERMINISTIC_WITNESSES, SMALL_PRIMES, fermat, miller_rabin
+
+
+# Candidates below this bound use the vectorized path.
+VECTOR_LIMIT = 2**63
+
+# Small primes used to screen a block before any exponentiation. Screening by more primes removes a few more
+# candidates but costs a full pass over the block each.
+SCREEN_PRIMES = SMALL_PRIMES[:54] # Every prime below 256
+
+_MASK32 = 0xFFFFFFFF
+
+
+def _mul_wide(a, b):
+    # The full 128-bit product of two uint64 arrays, returned as (high word, low word). The four 32 x 32-bit
+    # partial products each fit in 64 bits, and the middle column sums three values below 2^32, so nothing
+    # overflows before it is carried.
+    aLow, aHigh = a & _MASK32, a >> 32
+    bLow, bHigh = b & _MASK32, b >> 32
+    lowLow = aLow * bLow
+    lowHigh = aLow * bHigh
+    highLow = aHigh * bLow
+    middle = (lowLow >> 32) + (lowHigh & _MASK32) + (highLow & _MASK32)
+    high = aHigh * bHigh + (lowHigh >> 32) + (highLow >> 32) + (middle >> 32)
+    low = (lowLow & _MASK32) | (middle << 32)
+    return high, low
+
+
+class _MontgomeryBlock:
+    # Montgomery arithmetic for a block of odd moduli below 2^63, one modulus per array element. Mirrors
+    # fermat.ModContext, but every operation acts on the whole block.
+
+    def __init__(self, N):
+        self.N = N
+        # N^-1 mod 2^64 by Newton's iteration: N is its own inverse mod 8, and each step doubles the correct bits.
+        inverse = N.copy()
+        for i in range(5):
+            inverse *= np.uint64(2) - N * inverse
+        self.Nprime = np.uint64(0) - inverse             # N * N' = -1 mod 2^64
+        self.one = (np.uint64(0xFFFFFFFFFFFFFFFF) % N + np.uint64(1)) % N # R mod N, which is 1 in Montgomery form
+        self.minusOne = N - self.one                     # -1 in Montgomery form
+        # R^2 mod N by doubling R mod N another 64 times. Each sum stays below 2N < 2^64.
+        R2 = self.one.copy()
+        for i in range(64):
+            R2 = R2 + R2
+            R2 = np.where(R2 >= N, R2 - N, R2)
+        self.R2 = R2
+
+    def mul(self, a, b):
+        # a * b * R^-1 mod N for residues a, b < N. With T = a*b < N^2, T + m*N is divisible by 2^64 and its high
+        # word is below 2N, so a single conditional subtraction finishes the reduction.
+        high, low = _mul_wide(a, b)
+        m = low * self.Nprime
+        mnHigh, mnLow = _mul_wide(m, self.N)
+        t = high + mnHigh + (low != 0).astype(np.uint64) # The low words sum to 0 or 2^64; carry the 2^64.
+        return np.where(t >= self.N, t - self.N, t)
+
+    def to_montgomery(self, a):
+        return self.mul(a % self.N, self.R2)
+
+    def pow(self, a, e):
+        # a^e for Montgomery-form bases a and per-element exponents e, by left-to-right square-and-multiply over
+        # all 63 bit positions. Elements with shorter exponents just square their 1 until their top bit comes up.
+        result = self.one.copy()
+        for bit in range(62, -1, -1):
+            result = self.mul(result, result)
+            useBase = ((e >> np.uint64(bit)) & np.uint64(1)).astype(bool)
+            if useBase.any():
+                result = np.where(useBase, self.mul(result, a), result)
+        return result
+
+
+def _settle_small(N):
+    # Splits a block into the candidates that need witnesses and those decided by parity or a small prime factor.
+    # Returns (verdicts, needsWitness): verdicts holds 1 for small primes and 0 for everything already known to be
+    # composite, and needsWitness marks the rest, which are all odd, coprime to SCREEN_PRIMES and above 256.
+    verdicts = np.zeros(len(N), dtype=np.uint8)
+    needsWitness = N > np.uint64(SCREEN_PRIMES[-1])
+    for p in SCREEN_PRIMES:
+        p = np.uint64(p)
+        verdicts |= (N == p)
+        needsWitness &= (N % p) != 0
+    return verdicts, needsWitness
+
+
+def _split_blocks(candidates):
+    # Separates candidates into the vectorizable ones (as a uint64 array, with their positions) and the rest.
+    small = [i for i, N in enumerate(candidates) if 0 <= N < VECTOR_LIMIT]
+    large = [i for i, N in enumerate(candidates) if not 0 <= N < VECTOR_LIMIT]
+    return np.array(small, dtype=np.int64), np.array([candidates[i] for i in small], dtype=np.uint64), large
+
+
+def _vector_fermat(N, k, generator):
+    # 1 where N passes k random Fermat witnesses in [2, N-2], for a screened block of odd N > 256.
+    block = _MontgomeryBlock(N)
+    passed = np.ones(len(N), dtype=bool)
+    for i in range(k):
+        a = block.to_montgomery(generator.integers(2, N - np.uint64(1), dtype=np.uint64))
+        passed &= block.pow(a, N - np.uint64(1)) == block.one
+    return passed.astype(np.uint8)
+
+
+def _vector_miller_rabin(N):
+    # 1 where N passes the strong test for every witness of the deterministic set that covers the largest N in the
+    # block, so the verdict is exact, as miller_rabin is below 2^64. For a screened block of odd N > 256.
+    block = _MontgomeryBlock(N)
+    d = N - np.uint64(1)
+    s = np.zeros(len(N), dtype=np.int64)
+    while True: # N - 1 = d * 2^s, one shift per trailing zero bit across the whole block.
+        even = (d & np.uint64(1)) == 0
+        if not even.any():
+            break
+        d = np.where(even, d >> np.uint64(1), d)
+        s += even
+    for bound, witnesses in DETERMINISTIC_WITNESSES:
+        if int(N.max()) < bound:
+            break
+
+    passed = np.ones(len(N), dtype=bool)
+    for witness in witnesses:
+        base = np.uint64(witness) % N
+        x = block.pow(block.to_montgomery(base), d)
+        strong = (base == 0) | (x == block.one) | (x == block.minusOne)
+        for r in range(1, int(s.max())):
+            x = block.mul(x, x)
+            strong |= (x == block.minusOne) & (r < s)
+        passed &= strong
+    return passed.astype(np.uint8)
+
+
+def prime_test_vector(candidates, k, seed=None):
+    # Same contract as fermat.prime_test_batch: returns a bytearray with 1 where both Fermat (k random witnesses)
+    # and Miller-Rabin say N is prime, and 0 otherwise. Blocks of word-sized candidates run as arrays;
+    # anything at or above 2^63, or everything if NumPy is missing, falls back to the scalar tests. Below 2^63
+    # Miller-Rabin is exact, and Fermat never rejects a prime, so only Miller-Rabin runs there and k (and seed)
+    # only matter for the scalar fallback.
+    candidates = list(candidates)
+    if np is None:
+        rng = random.Random(seed)
+        return bytearray(fermat(N, k, rng) == 'prime' and miller_rabin(N, k, rng) == 'prime' for N in candidates)
+
+    results = bytearray(len(candidates))
+    positions, N, large = _split_blocks(candidates)
+    if len(N):
+        verdicts, needsWitness = _settle_small(N)
+        if needsWitness.any():
+            # Every candidate this passes is prime, so Fermat rounds after it could not change a verdict.
+            verdicts[needsWitness] = _vector_miller_rabin(N[needsWitness])
+        for position, verdict in zip(positions.tolist(), verdicts.tolist()):
+            results[position] = verdict
+
+    rng = random.Random(seed)
+    for i in large:
+        N = candidates[i]
+        results[i] = fermat(N, k, rng) == 'prime' and miller_rabin(N, k, rng) == 'prime'
+    return results
+
+
+def fermat_vector(candidates, k, seed=None):
+    # Fermat verdicts with k random witnesses per candidate, as a bytearray with 1 for 'prime'. Candidates with a
+    # factor in SCREEN_PRIMES are reported composite without spending witnesses on them (so a Carmichael number with
+    # a small factor is caught here even when fermat might miss it). Candidates at or above 2^63 use the scalar fermat.
+    candidates = list(candidates)
+    if np is None:
+        rng = random.Random(seed)
+        return bytearray(fermat(N, k, rng) == 'prime' for N in candidates)
+
+    results = bytearray(len(candidates))
+    positions, N, large = _split_blocks(candidates)
+    if len(N):
+        verdicts, needsWitness = _settle_small(N)
+        if needsWitness.any():
+            verdicts[needsWitness] = _vector_fermat(N[needsWitness], k, np.random.default_rng(seed))
+        for position, verdict in zip(positions.tolist(), verdicts.tolist()):
+            results[position] = verdict
+    rng = random.Random(seed)
+    for i in large:
+        results[i] = fermat(candidates[i], k, rng) == 'prime'
+    return results
+
+
+def miller_rabin_vector(candidates):
+    # Exact Miller-Rabin verdicts for a block of candidates below 2^63, as a bytearray with 1 for prime.
+    # Candidates at or above 2^63 fall back to the scalar miller_rabin, which is also exact below 2^64.
+    candidates = list(candidates)
+    if np is None:
+        return bytearray(miller_rabin(N, 1) == 'prime' for N in candidates)
+
+    results = bytearray(len(candidates))
+    positions, N, large = _split_blocks(candidates)
+    if len(N):
+        verdicts, needsWitness = _settle_small(N)
+        if needsWitness.any():
+            verdicts[needsWitness] = _vector_miller_rabin(N[needsWitness])
+        for position, verdict in zip(positions.tolist(), verdicts.tolist()):
+            results[position] = verdict
+    for i in large:
+        results[i] = miller_rabin(candidates[i], 1) == 'prime'
+    return results
@@ -2,7 +2,6 @@
 
 
 import math
-import random
 import signal
 import sys
 import time
@@ -30,6 +29,7 @@ else:
 
 # Import the code with the actual implementation
 from convex_hull import *
+from point_generator import generate_points
 #from convex_hull_complete_nonthread import *
 
 
@@ -127,54 +127,25 @@ class Proj2GUI( QMainWindow ):
 # start the GUI
 		self.initUI()
 
-# Generator for new sets of points that represent hull finding problem instances
+# Generator for new sets of points that represent hull finding problem instances. The points themselves come from
+# point_generator in bulk; only the conversion to QPointF for the view happens here.
 	def newPoints(self):
 
 		# TODO - ERROR CHECKING!!!!
 		if self.randBySeed.isChecked():
 			seed = int(self.randSeed.text())
-			random.seed( seed )
 		else: # do by time
-			random.seed( time.time() )
+			seed = time.time_ns()
 
-		ptlist = []
-		unique_xvals = {}
-		max_r  = 0.98
-		WIDTH  = 1.0
-		HEIGHT = 1.0
 		npoints = int(self.npoints.text())
 		if self.distribOval.isChecked():
-			while len(ptlist) < npoints:
-				x = random.uniform(-1.0,1.0)
-				y = random.uniform(-1.0,1.0)
-				if x**2+y**2 <= max_r**2:
-					xval = WIDTH*x
-					yval = HEIGHT*y
-					if not xval in unique_xvals:
-						ptlist.append( QPointF(xval,yval) )
-						unique_xvals[xval] = 1      # dict/map with float keys?
+			distribution = 'uniform'
 		elif self.distribSphere.isChecked():
-			while len(ptlist) < npoints:
-				x = random.uniform(-1.0,1.0)
-				y = random.uniform(-1.0,1.0)
-				z = random.uniform(-1.0,1.0)
-				if x**2 + y**2 + z**2 <= max_r**2:
-					xval = WIDTH*x
-					yval = HEIGHT*y
-					if not xval in unique_xvals:
-						ptlist.append( QPointF(xval,yval) )
-						unique_xvals[xval] = 1
-		elif self.distribGaussian.isChecked():
-			while len(ptlist) < npoints:
-				x = random.gauss(0.0,0.25)
-				y = random.gauss(0.0,0.25)
-				if x**2+y**2 <= max_r**2:
-					xval = WIDTH*x
-					yval = HEIGHT*y
-					if not xval in unique_xvals:
-						ptlist.append( QPointF(xval,yval) )
-						unique_xvals[xval] = 1
-		return ptlist
+			distribution = 'spherical'
+		else:
+			distribution = 'gaussian'
+		xs, ys = generate_points(npoints, distribution, seed)
+		return [QPointF(x, y) for x, y in zip(xs.tolist(), ys.tolist())]
 
 # Methods that handle GUI events
 	def clearClicked(self):
@@ -204,7 +175,11 @@ class Proj2GUI( QMainWindow ):
 		self.solveButton.setEnabled(False)
 		self.view.update()
 		app.processEvents()							#Why is this necessary?????
-		self.solver.compute_hull(self.points,self.showRecursion.isChecked(),self.view)
+		if self.incremental.isChecked():
+			self.solver.update_hull(self.points,self.showRecursion.isChecked(),self.view)
+		else:
+			self.solver.compute_hull(self.points,self.showRecursion.isChecked(),self.view,
+									 prefilter=self.prefilter.isChecked())
 		self.generateButton.setEnabled(True)
 		self.clearButton.setEnabled(True)
 		self.view.update()
@@ -243,6 +218,8 @@ class Proj2GUI( QMainWindow ):
 		self.randSeed       = QLineEdit('0')
 
 		self.showRecursion	= QCheckBox('Show Recursion')
+		self.prefilter		= QCheckBox('Prefilter')
+		self.incremental	= QCheckBox('Incremental')
 
 		h = QHBoxLayout()
 		h.addWidget( self.view )
@@ -279,6 +256,8 @@ class Proj2GUI( QMainWindow ):
 		h.addWidget( self.randSeed )
 		h.addStretch(1)
 		h.addWidget(self.showRecursion)
+		h.addWidget(self.prefilter)
+		h.addWidget(self.incremental)
 		vbox.addLayout(h)
 
 		self.generateButton.clicked.connect(self.generateClicked)
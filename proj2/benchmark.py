@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+# Headless timing harness for the hull engines in hull_core.py. It needs neither PyQt nor a display:
+#   python3 benchmark.py
+
+import argparse
+import math
+import random
+import sys
+import time
+from array import array
+
+from hull_core import ENGINES, as_coordinate_arrays, hull_indices
+from point_generator import DISTRIBUTIONS, generate_points
+
+
+SIZES = [10**3, 10**4, 10**5, 10**6, 10**7]
+
+# The divide and conquer engine is far slower than the others on big inputs, so it is skipped above this size
+# unless --max-dc says otherwise.
+MAX_DC_POINTS = 10**6
+
+# Hull sizes, as fractions h/n of the input, for the --hull-ratio comparison of Chan's algorithm with the others.
+HULL_RATIOS = [1e-4, 1e-3, 1e-2, 1e-1, 0.5, 1.0]
+RATIO_ENGINES = ('divide_and_conquer', 'monotone_chain', 'chan')
+
+
+def benchmark_engines(sizes=SIZES, engines=ENGINES, max_dc=MAX_DC_POINTS, seed=312, prefilter=False,
+					  distribution='uniform'):
+	# Times each engine on the same point sets and checks that they all find the same hull.
+	# Returns a list of rows: (npoints, {engine: seconds}), leaving out engines that were skipped.
+	rows = []
+	for npoints in sizes:
+		xs, ys = as_coordinate_arrays(*generate_points(npoints, distribution, seed))
+		timings = {}
+		hulls = {}
+		for engine in engines:
+			if engine == 'divide_and_conquer' and npoints > max_dc:
+				continue
+			start = time.perf_counter()
+			hull = hull_indices(xs, ys, engine, prefilter=prefilter)
+			timings[engine] = time.perf_counter() - start
+			hulls[engine] = hull
+		reference = next(iter(hulls.values()))
+		for engine, hull in hulls.items():
+			assert hull == reference, 'engine {} disagrees at {} points'.format(engine, npoints)
+		rows.append((npoints, timings))
+	return rows
+
+
+# npoints points whose hull has exactly hullSize vertices: hullSize points evenly spaced (with a random rotation)
+# on the unit circle, and the rest uniform in a disk that fits inside the polygon they make.
+def hull_ratio_points(npoints, hullSize, seed):
+	rng = random.Random(seed)
+	hullSize = max(3, min(hullSize, npoints))
+	offset = rng.uniform(0, 2 * math.pi)
+	angles = [offset + 2 * math.pi * i / hullSize for i in range(hullSize)]
+	xs, ys = generate_points(npoints - hullSize, 'uniform', seed)
+	scale = 0.95 * math.cos(math.pi / hullSize) / 0.98
+	xs = array('d', [x * scale for x in xs] + [math.cos(angle) for angle in angles])
+	ys = array('d', [y * scale for y in ys] + [math.sin(angle) for angle in angles])
+	return xs, ys
+
+
+def benchmark_hull_ratios(npoints, ratios=HULL_RATIOS, engines=RATIO_ENGINES, seed=312):
+	# Times each engine on npoints points at each hull size h = ratio * n, to show where the output-sensitive
+	# engine stops paying off. Returns rows of ('h/n=<ratio>', {engine: seconds}).
+	rows = []
+	for ratio in ratios:
+		xs, ys = hull_ratio_points(npoints, int(ratio * npoints), seed)
+		timings = {}
+		hulls = {}
+		for engine in engines:
+			start = time.perf_counter()
+			hulls[engine] = hull_indices(xs, ys, engine)
+			timings[engine] = time.perf_counter() - start
+		reference = next(iter(hulls.values()))
+		for engine, hull in hulls.items():
+			assert hull == reference, 'engine {} disagrees at h/n = {}'.format(engine, ratio)
+		rows.append(('h/n={:g}'.format(ratio), timings))
+	return rows
+
+
+def print_table(rows, engines=ENGINES, label='points'):
+	widths = [max(20, len(engine)) for engine in engines]
+	print('{:>10} '.format(label) + ' '.join('{:>{}}'.format(engine, width) for engine, width in zip(engines, widths)))
+	for npoints, timings in rows:
+		cells = ['{:>{}.4f}'.format(timings[engine], width) if engine in timings else '{:>{}}'.format('-', width)
+				 for engine, width in zip(engines, widths)]
+		print('{:>10} '.format(npoints) + ' '.join(cells))
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Benchmarks for the convex hull engines.')
+	parser.add_argument('sizes', nargs='*', type=int, default=SIZES, help='point counts to time')
+	parser.add_argument('--max-dc', type=int, default=MAX_DC_POINTS,
+						help='largest input to run divide and conquer on (default %(default)s)')
+	parser.add_argument('--prefilter', action='store_true', help='run the Akl-Toussaint filter before each engine')
+	parser.add_argument('-d', '--distribution', choices=DISTRIBUTIONS, default='uniform',
+						help='point distribution (default %(default)s)')
+	parser.add_argument('-s', '--seed', type=int, default=312, help='generator seed (default %(default)s)')
+	parser.add_argument('--hull-ratio', type=int, metavar='N',
+						help='instead, time {} on N points at hull sizes h/n in {}'.format(', '.join(RATIO_ENGINES), HULL_RATIOS))
+	args = parser.parse_args(argv)
+	if args.hull_ratio:
+		print_table(benchmark_hull_ratios(args.hull_ratio, seed=args.seed), RATIO_ENGINES, label='hull')
+		return 0
+	print_table(benchmark_engines(args.sizes, max_dc=args.max_dc, seed=args.seed, prefilter=args.prefilter,
+								  distribution=args.distribution))
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
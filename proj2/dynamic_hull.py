@@ -0,0 +1,97 @@
+# A convex hull that grows one point at a time. The hull is kept as its upper and lower chains, each a pair of lists
+# (xs, ys) sorted by x, so every query starts with a binary search (bisect) instead of a pass over the points:
+#
+#   hull = DynamicHull()
+#   hull.insert(0.1, 0.2)
+#   hull.contains(0.0, 0.0)
+#   xs, ys = hull.hull()
+#
+# Points that land inside the hull are not stored at all, so memory is O(h) for h hull vertices.
+
+import bisect
+from array import array
+
+from predicates import orient2d
+
+
+class _Chain:
+	# One monotone chain of the hull, left to right. sign is -1 for the upper chain, whose turns are all clockwise,
+	# and +1 for the lower chain, whose turns are all counter-clockwise; multiplying a turn by sign makes "convex"
+	# positive for both.
+
+	def __init__(self, sign):
+		self.sign = sign
+		self.xs = []
+		self.ys = []
+
+	# True when (x, y) is on the hull side of this chain or on the chain itself: below or on the upper chain, above
+	# or on the lower chain. Points outside the chain's x range count as outside.
+	def covers(self, x, y):
+		xs, ys, sign = self.xs, self.ys, self.sign
+		i = bisect.bisect_left(xs, x)
+		if (i == len(xs)):
+			return False
+		if (xs[i] == x):
+			return sign * (y - ys[i]) >= 0
+		if (i == 0):
+			return False
+		return sign * orient2d(xs[i-1], ys[i-1], xs[i], ys[i], x, y) >= 0
+
+	# Adds (x, y) to the chain unless it is covered, and removes the points it makes non-convex. The search is
+	# O(log h); every removed point was added once, so the removals are O(1) amortized.
+	def insert(self, x, y):
+		xs, ys, sign = self.xs, self.ys, self.sign
+		i = bisect.bisect_left(xs, x)
+		if (i < len(xs) and xs[i] == x):
+			if (sign * (y - ys[i]) >= 0): # Same x and not further out than the chain point already there
+				return False
+			del xs[i], ys[i]
+		elif (0 < i < len(xs) and sign * orient2d(xs[i-1], ys[i-1], xs[i], ys[i], x, y) >= 0):
+			return False
+		xs.insert(i, x)
+		ys.insert(i, y)
+
+		# Right neighbours that now lie on or inside the segment from the new point to the one after them
+		while (i + 2 < len(xs) and sign * orient2d(x, y, xs[i+1], ys[i+1], xs[i+2], ys[i+2]) <= 0):
+			del xs[i+1], ys[i+1]
+		# And the same to the left
+		while (i >= 2 and sign * orient2d(xs[i-2], ys[i-2], xs[i-1], ys[i-1], x, y) <= 0):
+			del xs[i-1], ys[i-1]
+			i -= 1
+		return True
+
+
+class DynamicHull:
+	# The convex hull of every point inserted so far. insert and contains cost O(log h) searches (plus the list
+	# shifts of an insert, which are memmoves), and hull() is O(h). The vertices come out in the same order as the
+	# batch engines in hull_core: counter-clockwise from the leftmost point, without collinear points.
+
+	def __init__(self, xs=(), ys=()):
+		self.upper = _Chain(-1)
+		self.lower = _Chain(1)
+		self.count = 0 # Points inserted, including the ones that were not kept
+		for x, y in zip(xs, ys):
+			self.insert(x, y)
+
+	# Adds a point. Returns True if it became a hull vertex.
+	def insert(self, x, y):
+		self.count += 1
+		addedUpper = self.upper.insert(x, y)
+		addedLower = self.lower.insert(x, y)
+		return addedUpper or addedLower
+
+	# True if (x, y) is inside the hull or on its boundary.
+	def contains(self, x, y):
+		return self.upper.covers(x, y) and self.lower.covers(x, y)
+
+	# The hull vertices as (xs, ys), two array('d'), counter-clockwise from the leftmost (then lowest) point: the
+	# lower chain left to right and then the upper chain right to left. Ends the two chains share are listed once.
+	def hull(self):
+		lower = list(zip(self.lower.xs, self.lower.ys))
+		upper = list(zip(self.upper.xs, self.upper.ys))[::-1]
+		if (upper and lower and upper[0] == lower[-1]):
+			upper = upper[1:]
+		if (upper and lower and upper[-1] == lower[0]):
+			upper = upper[:-1]
+		vertices = lower + upper
+		return array('d', [x for x, y in vertices]), array('d', [y for x, y in vertices])
@@ -0,0 +1,461 @@
+# Qt-free core of the convex hull solver. Points are two contiguous float64 arrays, xs and ys (array('d') here, but
+# NumPy float64 arrays work too), so a point costs 16 bytes instead of a QPointF object and a list slot, and nothing in
+# here needs PyQt or a display. Every engine returns the hull as a list of indices into xs and ys, counter-clockwise
+# from the leftmost point; convex_hull.py turns those back into QPointF and QLineF for the GUI.
+
+import concurrent.futures
+import ctypes
+import multiprocessing
+import os
+from array import array
+
+from predicates import ORIENT_ERROR_BOUND, orient2d
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+
+# The hull algorithms, by the name compute_hull takes
+ENGINES = ('divide_and_conquer', 'parallel_divide_and_conquer', 'monotone_chain', 'chan')
+
+
+# Copies any pair of coordinate sequences (lists, NumPy arrays, generators) into array('d'). Arrays that already are
+# array('d') are passed through without a copy, and NumPy arrays are copied as one block of bytes.
+def as_coordinate_arrays(xs, ys):
+	xs = _as_float64_array(xs)
+	ys = _as_float64_array(ys)
+	if len(xs) != len(ys):
+		raise ValueError('xs and ys must have the same length')
+	return xs, ys
+
+def _as_float64_array(values):
+	if isinstance(values, array) and values.typecode == 'd':
+		return values
+	if np is not None and isinstance(values, np.ndarray):
+		result = array('d')
+		result.frombytes(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+		return result
+	return array('d', values)
+
+
+# Runs one engine on the coordinate arrays and returns the hull indices. onTangent and onMerge are passed to the
+# divide and conquer engine, which calls them as it merges so a GUI can show the recursion. With prefilter, the
+# Akl-Toussaint filter below drops the points that cannot be on the hull first, and the engine only sees the rest.
+def hull_indices(xs, ys, engine='divide_and_conquer', onTangent=None, onMerge=None, prefilter=False):
+	xs, ys = as_coordinate_arrays(xs, ys)
+	if prefilter:
+		survivors = akl_toussaint_filter(xs, ys)
+		hull = hull_indices([xs[i] for i in survivors], [ys[i] for i in survivors], engine,
+							onTangent and (lambda left, right: onTangent(survivors[left], survivors[right])),
+							onMerge and (lambda indices: onMerge([survivors[i] for i in indices])))
+		return [survivors[i] for i in hull]
+	if engine == 'divide_and_conquer':
+		return divide_and_conquer(xs, ys, onTangent, onMerge)
+	elif engine == 'parallel_divide_and_conquer':
+		return parallel_divide_and_conquer(xs, ys)
+	elif engine == 'monotone_chain':
+		return monotone_chain(xs, ys)
+	elif engine == 'chan':
+		return chan(xs, ys)
+	else:
+		raise ValueError('Unknown hull engine: {}'.format(engine))
+
+
+# The eight directions of the Akl-Toussaint octagon, in counter-clockwise order. The point furthest in each
+# direction is a hull vertex.
+OCTAGON_DIRECTIONS = ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))
+
+# Akl-Toussaint interior-point filter. The points furthest in the eight OCTAGON_DIRECTIONS are all hull vertices, so
+# the octagon through them lies inside the hull, and any point strictly inside it cannot be a hull vertex. Returns
+# the indices of the points that are not strictly inside, in their original order. For uniform and Gaussian clouds
+# that is a small fraction of the input. O(n) time; with NumPy the eight extremes and the inside test are each one
+# array-wide pass, without it the same test runs point by point.
+def akl_toussaint_filter(xs, ys):
+	if len(xs) < 9:
+		return list(range(len(xs)))
+	if np is not None:
+		X = np.frombuffer(xs, dtype=np.float64)
+		Y = np.frombuffer(ys, dtype=np.float64)
+		corners = [int(np.argmax(dx * X + dy * Y)) for dx, dy in OCTAGON_DIRECTIONS]
+	else:
+		corners = [max(range(len(xs)), key=lambda i: dx * xs[i] + dy * ys[i]) for dx, dy in OCTAGON_DIRECTIONS]
+
+	# Corners that repeat (one point can be extreme in several directions) would give zero-length edges.
+	octagon = [corner for i, corner in enumerate(corners) if (xs[corner], ys[corner]) !=
+			   (xs[corners[i-1]], ys[corners[i-1]])]
+	if (len(octagon) < 3):
+		return list(range(len(xs)))
+	edges = [(xs[a], ys[a], xs[b], ys[b]) for a, b in zip(octagon, octagon[1:] + octagon[:1])]
+
+	if np is not None:
+		inside = np.ones(len(X), dtype=bool)
+		for ax, ay, bx, by in edges: # Strictly left of every counter-clockwise edge
+			left = (bx - ax) * (Y - ay)
+			right = (by - ay) * (X - ax)
+			# orient2d's error bound, so a point too close to an edge to be sure of is kept rather than dropped
+			inside &= left - right > ORIENT_ERROR_BOUND * (np.abs(left) + np.abs(right))
+		return np.flatnonzero(~inside).tolist()
+	return [i for i in range(len(xs)) if not all(orient2d(ax, ay, bx, by, xs[i], ys[i]) > 0 for ax, ay, bx, by in edges)]
+
+
+# Positive when o -> a -> b turns counter-clockwise (b is left of the line o -> a), negative when it turns clockwise
+# and 0 when the points are collinear. The sign is exact (see predicates.orient2d), so the engines need neither
+# unique x values nor any tolerance.
+# This is the engines' inner loop, so orient2d's error-bound test is repeated here as a single comparison, and
+# orient2d is only called when it fails (including for exactly collinear points).
+def orientation(xs, ys, o, a, b):
+	ox = xs[o]
+	oy = ys[o]
+	left = (xs[a] - ox) * (ys[b] - oy)
+	right = (ys[a] - oy) * (xs[b] - ox)
+	det = left - right
+	if (abs(det) > ORIENT_ERROR_BOUND * (abs(left) + abs(right))):
+		return det
+	return orient2d(ox, oy, xs[a], ys[a], xs[b], ys[b])
+
+
+# Inputs at least this big are sorted with NumPy, when it is installed.
+NUMPY_SORT_MIN_POINTS = 1 << 6
+
+# The point indices sorted by x and then by y, with each repeated point (same x and y) kept once, as its first index.
+# Every engine starts from this order, which is what lets points share an x value: ties are broken by y, as if the
+# plane were turned very slightly. Two stable sorts on plain keys are faster than one sort on (x, y) tuples.
+def sorted_points(xs, ys):
+	if (np is not None and len(xs) >= NUMPY_SORT_MIN_POINTS):
+		X = np.asarray(xs, dtype=np.float64)
+		Y = np.asarray(ys, dtype=np.float64)
+		order = np.lexsort((Y, X))
+		keep = np.ones(len(order), dtype=bool)
+		keep[1:] = (np.diff(X[order]) != 0) | (np.diff(Y[order]) != 0)
+		return order[keep].tolist()
+	order = sorted(range(len(xs)), key=ys.__getitem__)
+	order.sort(key=xs.__getitem__)
+	return [point for i, point in enumerate(order)
+			if i == 0 or xs[point] != xs[order[i-1]] or ys[point] != ys[order[i-1]]]
+
+
+# My divide and conquer solver, on point indices. Returns the indices of the points in the hull, sorted
+# counter-clockwise from the leftmost point.
+#
+# The points are sorted by x (then y) once. Every sub-hull is then kept as a list in clockwise order starting at its
+# leftmost point, together with the position of its rightmost point, so a merge never has to sort anything (see
+# merge_hulls). Each merge is O(h) time for the h points of the two sub-hulls, so the whole thing is O(nlogn) time
+# (the first sort) and O(n) space.
+#
+# onTangent(leftPoint, rightPoint) is called with the upper and lower tangent of every merge, and onMerge(hull) with
+# every merged sub-hull, so a GUI can show the recursion.
+def divide_and_conquer(xs, ys, onTangent=None, onMerge=None):
+	sortedPoints = sorted_points(xs, ys)
+	if (len(sortedPoints) == 0):
+		return []
+	hull, rightmost = clockwise_hull(xs, ys, sortedPoints, 0, len(sortedPoints), onTangent, onMerge)
+	return counter_clockwise(hull)
+
+
+# Flips a clockwise hull to counter-clockwise, still starting from the same (leftmost) point.
+def counter_clockwise(hull):
+	return hull[:1] + hull[:0:-1]
+
+
+# The recursive half of divide_and_conquer. Returns (hull, rightmost) for the points sortedPoints[start:end], which
+# must be distinct and sorted by x, then y (see sorted_points): the hull in clockwise order from the leftmost point,
+# and the position of the rightmost point in it.
+def clockwise_hull(xs, ys, sortedPoints, start, end, onTangent=None, onMerge=None):
+	# MARKER 1 - BASE CASE. Up to three sorted points are put in clockwise order directly.
+	if (end - start <= 3):
+		points = list(sortedPoints[start:end])
+		if (len(points) < 3):
+			return points, len(points) - 1
+		a, b, c = points
+		turn = orientation(xs, ys, a, c, b)
+		if (turn > 0): # b is above a -> c, so clockwise goes over it first
+			return [a, b, c], 2
+		elif (turn < 0):
+			return [a, c, b], 1
+		return [a, c], 1 # b is on the segment a -> c and not a hull vertex
+
+	# MARKER 2 - DIVIDING INTO TWO SMALLER HULLS
+	middle = (start + end) // 2
+	left = clockwise_hull(xs, ys, sortedPoints, start, middle, onTangent, onMerge)
+	right = clockwise_hull(xs, ys, sortedPoints, middle, end, onTangent, onMerge)
+	hull, rightmost = merge_hulls(xs, ys, left, right, onTangent)
+	if (onMerge is not None):
+		onMerge(hull)
+	return hull, rightmost
+
+
+# Merges two clockwise sub-hulls, each given as (hull, rightmost) with every point of left before every point of
+# right in sorted_points order, into the clockwise (hull, rightmost) of their union. The upper tangent walks back
+# from the left hull's rightmost point and forward from the right hull's leftmost point, the lower tangent does the
+# opposite, and the merged hull is spliced together from the two lists, all in O(h) time.
+def merge_hulls(xs, ys, left, right, onTangent=None):
+	leftHull, leftRightmost = left
+	rightHull, rightRightmost = right
+	leftSize = len(leftHull)
+	rightSize = len(rightHull)
+
+	# MARKER 3 - UPPER TANGENT. On the left hull, counter-clockwise is backwards in the list, and on the right hull,
+	# clockwise is forwards. Each side moves while its next point is above the current tangent line, or on it
+	# (a point on the line is further out along it, which leaves the current one inside the hull edge).
+	upperLeft = leftRightmost
+	upperRight = 0
+	moved = True
+	while (moved):
+		moved = False
+		while (upperLeft > 0 and orientation(xs, ys, leftHull[upperLeft], rightHull[upperRight], leftHull[upperLeft-1]) >= 0):
+			upperLeft -= 1
+			moved = True
+		while (upperRight < rightRightmost and
+				orientation(xs, ys, leftHull[upperLeft], rightHull[upperRight], rightHull[upperRight+1]) >= 0):
+			upperRight += 1
+			moved = True
+
+	# MARKER 4 - LOWER TANGENT. The same walk flipped: forwards on the left hull and backwards on the right hull,
+	# while the next point is below or on the line. Position size stands for the leftmost point again, at the end of
+	# the clockwise order.
+	lowerLeft = leftRightmost
+	lowerRight = rightSize
+	moved = True
+	while (moved):
+		moved = False
+		while (lowerLeft < leftSize and
+				orientation(xs, ys, leftHull[lowerLeft], rightHull[lowerRight%rightSize], leftHull[(lowerLeft+1)%leftSize]) <= 0):
+			lowerLeft += 1
+			moved = True
+		while (lowerRight > rightRightmost and
+				orientation(xs, ys, leftHull[lowerLeft%leftSize], rightHull[lowerRight%rightSize], rightHull[lowerRight-1]) <= 0):
+			lowerRight -= 1
+			moved = True
+
+	if (onTangent is not None):
+		onTangent(leftHull[upperLeft], rightHull[upperRight])
+		onTangent(leftHull[lowerLeft%leftSize], rightHull[lowerRight%rightSize])
+
+	# MARKER 5 - SPLICE. Clockwise from the leftmost point: the left hull up to the upper tangent, the right hull
+	# from the upper to the lower tangent, then the left hull from the lower tangent back round. A point that
+	# both tangents touch is only taken once.
+	rightPart = [rightHull[i%rightSize] for i in range(upperRight, min(lowerRight, upperRight + rightSize - 1) + 1)]
+	hull = leftHull[:upperLeft+1] + rightPart + leftHull[max(lowerLeft, upperLeft+1):]
+	rightmost = upperLeft + 1 + rightRightmost - upperRight
+	return hull, rightmost
+
+
+# Andrew's monotone chain solver. It sorts the points once by x (then y), and then builds the lower hull
+# left to right and the upper hull right to left. Each scan pops a point whenever the last two points and
+# the new one fail to make a counter-clockwise turn, so every point is pushed and popped at most once.
+# That makes the scans O(n) time and the whole thing O(nlogn) time and O(n) space, with no slopes,
+# no divisions and no re-sorting. Returns the same counter-clockwise order as divide_and_conquer.
+def monotone_chain(xs, ys):
+	sortedPoints = sorted_points(xs, ys)
+	if (len(sortedPoints) < 3):
+		return sortedPoints
+
+	lowerHull = []
+	for point in sortedPoints:
+		while (len(lowerHull) >= 2 and orientation(xs, ys, lowerHull[-2], lowerHull[-1], point) <= 0):
+			lowerHull.pop()
+		lowerHull.append(point)
+
+	upperHull = []
+	for point in reversed(sortedPoints):
+		while (len(upperHull) >= 2 and orientation(xs, ys, upperHull[-2], upperHull[-1], point) <= 0):
+			upperHull.pop()
+		upperHull.append(point)
+
+	# The last point of each chain is the first point of the other one.
+	return lowerHull[:-1] + upperHull[:-1]
+
+
+# The first round of chan, whose groups have 2^2^t = 256 points
+CHAN_FIRST_ROUND = 3
+
+# Chan's output-sensitive solver, O(nlogh) time for h hull vertices and O(n) space. It guesses a bound m on h, cuts
+# the points into groups of m, finds each group's hull with monotone_chain (O(nlogm) in total), and then gift-wraps
+# the whole set from the leftmost point. Each wrapping step asks every group for its tangent from the current point
+# with a binary search (O(logm) per group), so at most m steps cost O(n/m * m * logm) = O(nlogm). If m steps are not
+# enough to get back to the start, the guess was too small and it is squared (m = 2^2^t), so the total stays
+# O(nlogh). Returns the same counter-clockwise order as the other engines.
+#
+# Every round pays for one monotone_chain pass over all n points in groups, so the first guesses of 4 and 16 only
+# cost time; the rounds start at t = CHAN_FIRST_ROUND instead, which changes no bound.
+def chan(xs, ys):
+	n = len(xs)
+	if (n < 3):
+		return monotone_chain(xs, ys)
+	start = min(range(n), key=lambda point: (xs[point], ys[point]))
+	t = CHAN_FIRST_ROUND
+	while True:
+		groupSize = min(2 ** (2 ** t), n)
+		hull = _wrap_groups(xs, ys, start, groupSize)
+		if (hull is not None):
+			return _drop_collinear(xs, ys, hull)
+		t += 1
+
+# Removes the vertices of a convex polygon that lie on the segment between their neighbours. The wrap can stop at
+# such a point when a tangent runs along a group's hull edge, and skipping them here is one O(h) pass instead of
+# two extra orientation tests in every tangent search.
+def _drop_collinear(xs, ys, hull):
+	if (len(hull) < 3):
+		return hull
+	return [hull[i] for i in range(len(hull)) if orientation(xs, ys, hull[i-1], hull[i], hull[(i+1) % len(hull)]) != 0]
+
+# One round of Chan's algorithm with groups of groupSize points. Returns the hull, or None if it has more than
+# groupSize vertices. A repeated point can be a vertex of several groups, so the wrap compares coordinates where it
+# checks for the current or the start point.
+def _wrap_groups(xs, ys, start, groupSize):
+	groups = []
+	groupOf = {} # Hull vertex -> (group, position in that group's hull)
+	for first in range(0, len(xs), groupSize):
+		group = [first + i for i in monotone_chain(xs[first:first+groupSize], ys[first:first+groupSize])]
+		for position, point in enumerate(group):
+			groupOf[point] = (len(groups), position)
+		groups.append(group)
+
+	hull = [start]
+	for step in range(groupSize):
+		current = hull[-1]
+		currentGroup, currentPosition = groupOf.get(current, (None, None))
+		best = None
+		for g, group in enumerate(groups):
+			if (g == currentGroup): # The current point is on this group's hull, so the candidate is simply the next vertex
+				candidate = group[(currentPosition + 1) % len(group)]
+			else:
+				position = _tangent(xs, ys, group, current)
+				candidate = group[position]
+				if (xs[candidate] == xs[current] and ys[candidate] == ys[current]):
+					# A repeat of the current point in another group (each group has its repeats removed by
+					# monotone_chain), so the same holds as above
+					candidate = group[(position + 1) % len(group)]
+			if (xs[candidate] == xs[current] and ys[candidate] == ys[current]):
+				continue
+			if (best is None):
+				best = candidate
+				continue
+			turn = orientation(xs, ys, current, best, candidate)
+			if (turn < 0 or (turn == 0 and _further(xs, ys, current, best, candidate))):
+				best = candidate # candidate is right of current -> best, or on that line and further away
+		if (best is None or (xs[best] == xs[start] and ys[best] == ys[start])):
+			return hull
+		hull.append(best)
+	return None
+
+# For b on the line from o through a: True if b is further from o than a is. Only the signs of coordinate
+# differences are used, so there is no rounding to get wrong.
+def _further(xs, ys, o, a, b):
+	return (xs[b] - xs[a]) * (xs[a] - xs[o]) > 0 or (ys[b] - ys[a]) * (ys[a] - ys[o]) > 0
+
+# The position in a counter-clockwise convex polygon of the vertex q with every vertex left of or on the line
+# point -> q, for a point outside the polygon, by binary search in O(logk) for k vertices. When a polygon edge lies
+# on that line, q can be either end of it; chan drops the nearer one afterwards (see _drop_collinear).
+def _tangent(xs, ys, polygon, point):
+	k = len(polygon)
+	if (k < 3):
+		best = 0
+		for i in range(1, k):
+			turn = orientation(xs, ys, point, polygon[best], polygon[i])
+			if (turn < 0 or (turn == 0 and _further(xs, ys, point, polygon[best], polygon[i]))):
+				best = i
+		return best
+	return _tangent_search(xs, ys, polygon, point)
+
+# Sunday's tangent search for _tangent: an edge "points up" when its end is left of the line from point to its
+# start, and the wanted vertex is where the edges stop pointing up and start pointing down.
+def _tangent_search(xs, ys, polygon, point):
+	k = len(polygon)
+
+	def above(i, j): # polygon[j] is left of point -> polygon[i]
+		return orientation(xs, ys, point, polygon[i % k], polygon[j % k]) > 0
+
+	def below(i, j):
+		return orientation(xs, ys, point, polygon[i % k], polygon[j % k]) < 0
+
+	if (below(1, 0) and not above(k - 1, 0)):
+		return 0
+	a, b = 0, k
+	while (b - a > 1):
+		c = (a + b) // 2
+		downC = below(c + 1, c)
+		if (downC and not above(c - 1, c)):
+			return c
+		if (above(a + 1, a)): # Edge a points up
+			if (downC or above(a, c)):
+				b = c
+			else:
+				a = c
+		else:
+			if (not downC or not below(a, c)):
+				a = c
+			else:
+				b = c
+
+	# The search assumes point is strictly outside the polygon. When it lies on an edge (or is collinear with one) the
+	# range can close without a match, so the vertex whose two neighbours are both left of or on point -> q is looked
+	# for directly, in O(k). Convexity makes that local test enough.
+	for q in range(k):
+		if (not below(q, q - 1) and not below(q, q + 1)):
+			return q
+	return 0
+
+
+# Inputs smaller than this go to divide_and_conquer in-process, since starting a pool costs more than it saves.
+PARALLEL_MIN_POINTS = 1 << 16
+
+# The x-sorted coordinates shared with the pool worker this process is running as, set up by _init_slab_worker.
+_slabCoordinates = None
+
+def _init_slab_worker(sortedXs, sortedYs):
+	global _slabCoordinates
+	_slabCoordinates = (sortedXs, sortedYs)
+
+# One unit of pool work: the clockwise (hull, rightmost) of the x-sorted points in positions start to end. Only this
+# slab is copied out of shared memory, and the hull comes back as positions in the sorted order.
+def _slab_hull(start, end):
+	sortedXs, sortedYs = _slabCoordinates
+	xs = _shared_slice(sortedXs, start, end)
+	ys = _shared_slice(sortedYs, start, end)
+	hull, rightmost = clockwise_hull(xs, ys, range(end - start), 0, end - start)
+	return [start + i for i in hull], rightmost
+
+def _shared_slice(shared, start, end):
+	values = array('d')
+	values.frombytes(ctypes.string_at(ctypes.addressof(shared) + start * values.itemsize, (end - start) * values.itemsize))
+	return values
+
+def _shared_copy(values):
+	shared = multiprocessing.RawArray('d', len(values))
+	ctypes.memmove(shared, values.buffer_info()[0], len(values) * values.itemsize)
+	return shared
+
+# divide_and_conquer with the first levels of the recursion spread over a pool of worker processes. The points are
+# sorted by x (then y) once and copied into shared memory, then cut into one slab of consecutive points per worker.
+# Each worker computes its slab's hull with clockwise_hull, and the slab hulls are merged pairwise with merge_hulls
+# in a reduction tree (log P rounds, each O(h)). Returns the same indices as divide_and_conquer.
+def parallel_divide_and_conquer(xs, ys, workers=None):
+	workers = workers or os.cpu_count() or 1
+	if (workers == 1 or len(xs) < PARALLEL_MIN_POINTS):
+		return divide_and_conquer(xs, ys)
+
+	order = sorted_points(xs, ys)
+	if np is not None:
+		positions = np.asarray(order, dtype=np.int64)
+		sortedXs = _as_float64_array(np.frombuffer(xs, dtype=np.float64)[positions])
+		sortedYs = _as_float64_array(np.frombuffer(ys, dtype=np.float64)[positions])
+	else:
+		sortedXs = array('d', [xs[i] for i in order])
+		sortedYs = array('d', [ys[i] for i in order])
+
+	bounds = [len(order) * i // workers for i in range(workers + 1)]
+	with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_slab_worker,
+												initargs=(_shared_copy(sortedXs), _shared_copy(sortedYs))) as pool:
+		hulls = list(pool.map(_slab_hull, bounds[:-1], bounds[1:]))
+
+	while (len(hulls) > 1): # Merge neighbouring slabs, which halves the number of hulls each round
+		merged = [merge_hulls(sortedXs, sortedYs, hulls[i], hulls[i+1]) for i in range(0, len(hulls) - 1, 2)]
+		if (len(hulls) % 2):
+			merged.append(hulls[-1])
+		hulls = merged
+
+	hull, rightmost = hulls[0]
+	return [order[i] for i in counter_clockwise(hull)]
@@ -0,0 +1,87 @@
+# Headless generator for the GUI's three point distributions. Points are drawn in bulk from a seeded NumPy
+# generator, rejected as whole arrays, and returned as two float64 arrays (xs, ys), so a million points take a
+# fraction of a second instead of a per-point Python loop. The same seed, size and distribution always give the same
+# points, which keeps hull benchmarks reproducible. Without NumPy the same distributions are drawn point by point
+# with random.Random (still seeded, but not the same points as the NumPy version).
+
+import math
+import random
+from array import array
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+
+# The distributions, by the name generate_points takes
+DISTRIBUTIONS = ('uniform', 'spherical', 'gaussian')
+
+# Every point is inside the disk of this radius
+MAX_R = 0.98
+
+# Standard deviation of each coordinate for the gaussian distribution
+GAUSSIAN_SIGMA = 0.25
+
+# Fraction of the raw draws that survive the rejection test, used to size each batch: the disk's share of the
+# square, the ball's share of the cube, and the Gaussian mass inside the disk.
+ACCEPTANCE = {
+	'uniform': math.pi * MAX_R**2 / 4,
+	'spherical': 4 / 3 * math.pi * MAX_R**3 / 8,
+	'gaussian': 0.999,
+}
+
+
+# Returns npoints points of the named distribution as (xs, ys), both float64 arrays of length npoints (NumPy arrays,
+# or array('d') without NumPy). The hull engines handle repeated x values, so they are not filtered out:
+#   uniform   - uniform over the disk of radius MAX_R
+#   spherical - uniform over the ball of radius MAX_R, projected onto the xy-plane
+#   gaussian  - normal with GAUSSIAN_SIGMA per coordinate, clipped to the disk
+# seed is anything numpy.random.default_rng accepts; None draws fresh entropy.
+def generate_points(npoints, distribution='uniform', seed=None):
+	if distribution not in DISTRIBUTIONS:
+		raise ValueError('Unknown distribution: {}'.format(distribution))
+	if np is None:
+		return _generate_points_scalar(npoints, distribution, seed)
+
+	rng = np.random.default_rng(seed)
+	xs = np.empty(0)
+	ys = np.empty(0)
+	while len(xs) < npoints:
+		# A little more than the expected number of draws, so one batch is nearly always enough.
+		batch = int((npoints - len(xs)) / ACCEPTANCE[distribution] * 1.05) + 64
+		x, y = _draw(rng, distribution, batch)
+		xs, ys = np.concatenate((xs, x)), np.concatenate((ys, y))
+	return xs[:npoints], ys[:npoints]
+
+
+# One batch of raw draws, with the rejected ones already removed.
+def _draw(rng, distribution, batch):
+	if distribution == 'uniform':
+		x, y = rng.uniform(-1.0, 1.0, size=(2, batch))
+		keep = x**2 + y**2 <= MAX_R**2
+	elif distribution == 'spherical':
+		x, y, z = rng.uniform(-1.0, 1.0, size=(3, batch))
+		keep = x**2 + y**2 + z**2 <= MAX_R**2
+	else:
+		x, y = rng.normal(0.0, GAUSSIAN_SIGMA, size=(2, batch))
+		keep = x**2 + y**2 <= MAX_R**2
+	return x[keep], y[keep]
+
+
+# The point-by-point version for when NumPy is missing, the same loop Proj2GUI.newPoints used to run.
+def _generate_points_scalar(npoints, distribution, seed):
+	rng = random.Random(seed)
+	xs = array('d')
+	ys = array('d')
+	while len(xs) < npoints:
+		if distribution == 'gaussian':
+			x, y, z = rng.gauss(0.0, GAUSSIAN_SIGMA), rng.gauss(0.0, GAUSSIAN_SIGMA), 0.0
+		else:
+			x, y, z = rng.uniform(-1.0, 1.0), rng.uniform(-1.0, 1.0), 0.0
+			if distribution == 'spherical':
+				z = rng.uniform(-1.0, 1.0)
+		if x**2 + y**2 + z**2 <= MAX_R**2:
+			xs.append(x)
+			ys.append(y)
+	return xs, ys
@@ -0,0 +1,44 @@
+# Exact orientation test for the hull engines. A cross product of float differences can round to the wrong sign (or
+# to zero) when the three points are nearly collinear, which is what used to make the engines depend on unique x
+# values. orient2d evaluates the cross product in floating point and checks it against Shewchuk's error bound;
+# only when the result is too close to zero to trust is it recomputed exactly with Fractions, which almost never
+# happens for random input, so the common case costs a few multiplications more than the plain cross product.
+
+from fractions import Fraction
+
+
+# Relative error bound for the floating-point cross product below (Shewchuk's ccwerrboundA, with epsilon = 2^-53):
+# if |det| is at least this times |left| + |right|, its sign is exact.
+ORIENT_ERROR_BOUND = (3.0 + 16.0 * 2.0**-53) * 2.0**-53
+
+
+# Positive when a -> b -> c turns counter-clockwise (c is left of the line a -> b), negative when it turns clockwise
+# and 0 when the points are collinear, with the sign always exact. The value returned has the right sign but is
+# only the cross product itself when the fast path decides.
+def orient2d(ax, ay, bx, by, cx, cy):
+	left = (bx - ax) * (cy - ay)
+	right = (by - ay) * (cx - ax)
+	det = left - right
+	# When left and right have opposite signs (or one is 0), det cannot cancel and its sign is right as computed.
+	if (left > 0):
+		if (right <= 0):
+			return det
+		detSum = left + right
+	elif (left < 0):
+		if (right >= 0):
+			return det
+		detSum = -left - right
+	else:
+		return det
+	errorBound = ORIENT_ERROR_BOUND * detSum
+	if (det >= errorBound or -det >= errorBound):
+		return det
+	return orient2d_exact(ax, ay, bx, by, cx, cy)
+
+
+# The same sign, as -1, 0 or 1, from exact rational arithmetic. Every float is a rational number, so nothing is
+# rounded; it is a few hundred times slower than the float version.
+def orient2d_exact(ax, ay, bx, by, cx, cy):
+	ax, ay, bx, by, cx, cy = map(Fraction, (ax, ay, bx, by, cx, cy))
+	det = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+	return (det > 0) - (det < 0)
@@ -0,0 +1,84 @@
+# Streaming convex hull for point sets too large to hold in memory. Points arrive in chunks of (xs, ys) coordinate
+# arrays; each chunk is filtered, its hull is merged with the running hull, and then the chunk is dropped, so memory
+# stays at one chunk plus the hull however many points go by. The readers below cut the usual sources into chunks:
+#
+#   hull = streaming_hull(binary_chunks('points.f64'))            # a file of float64 (x, y) pairs
+#   hull = streaming_hull(array_chunks(np.load('p.npy', mmap_mode='r')))
+#   hull = streaming_hull(point_chunks(sensor_readings()), onProgress=print)
+
+import os
+from array import array
+
+from hull_core import akl_toussaint_filter, as_coordinate_arrays, monotone_chain
+
+
+# Points per chunk. A chunk costs 16 bytes per point as coordinates, plus the engine's working space.
+STREAM_CHUNK = 1 << 20
+
+
+# Computes the hull of every point in chunks, an iterable of (xs, ys) coordinate pairs (anything hull_core accepts).
+# After each chunk, onProgress(pointsSeen, hullSize) is called if given. Returns the hull vertices as (xs, ys), two
+# array('d') counter-clockwise from the leftmost point.
+#
+# Chunks are independent, so they do not need sorting between them: every chunk is run through the
+# Akl-Toussaint filter, and the survivors and the current hull vertices go to monotone_chain together. That is
+# O(c) time per chunk of c points plus O((h + s)log(h + s)) for its s survivors, and O(c + h) space.
+def streaming_hull(chunks, onProgress=None):
+	hullXs = array('d')
+	hullYs = array('d')
+	pointsSeen = 0
+	for xs, ys in chunks:
+		xs, ys = as_coordinate_arrays(xs, ys)
+		pointsSeen += len(xs)
+		survivors = akl_toussaint_filter(xs, ys)
+		hullXs.extend(xs[i] for i in survivors)
+		hullYs.extend(ys[i] for i in survivors)
+		hull = monotone_chain(hullXs, hullYs)
+		hullXs = array('d', [hullXs[i] for i in hull])
+		hullYs = array('d', [hullYs[i] for i in hull])
+		if (onProgress is not None):
+			onProgress(pointsSeen, len(hull))
+	return hullXs, hullYs
+
+
+# Cuts any iterable of (x, y) pairs, such as a generator reading a sensor feed, into coordinate chunks.
+def point_chunks(points, chunkSize=STREAM_CHUNK):
+	xs = array('d')
+	ys = array('d')
+	for x, y in points:
+		xs.append(x)
+		ys.append(y)
+		if (len(xs) == chunkSize):
+			yield xs, ys
+			xs = array('d')
+			ys = array('d')
+	if (len(xs)):
+		yield xs, ys
+
+
+# Reads a binary file of native float64 values, x0 y0 x1 y1 ..., in chunks. source is a path or a binary file object;
+# a path is opened and closed here.
+def binary_chunks(source, chunkSize=STREAM_CHUNK):
+	if isinstance(source, (str, os.PathLike)):
+		with open(source, 'rb') as f:
+			yield from binary_chunks(f, chunkSize)
+		return
+	while True:
+		values = array('d')
+		try:
+			values.fromfile(source, 2 * chunkSize)
+		except EOFError: # Raised for a short last chunk, which still holds whatever was read
+			pass
+		if (len(values) % 2):
+			raise ValueError('the file ends in the middle of a point')
+		if (len(values) == 0):
+			return
+		yield values[0::2], values[1::2]
+
+
+# Cuts an (n, 2) array of points into chunks. With a NumPy memmap (np.memmap, or np.load with mmap_mode='r') each
+# slice only reads its own rows from disk, so the file is never loaded whole.
+def array_chunks(points, chunkSize=STREAM_CHUNK):
+	for start in range(0, len(points), chunkSize):
+		block = points[start:start+chunkSize]
+		yield block[:, 0], block[:, 1]